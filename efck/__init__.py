@@ -1,4 +1,7 @@
-from .qt import *
+import sys as _sys
+
+from .profiling import phase as _phase
+
 try:
     from ._version import __version__
 except ImportError:
@@ -6,22 +9,41 @@ except ImportError:
 
 __website__ = 'https://efck-chat-keyboard.github.io'
 
+APP_NAME = 'efck-chat-keyboard'
+
 cli_args = []  # Manager object. Parsed args will be at 0 index
 
-if not QApplication.instance():
-    import sys
-    qApp = QApplication(sys.argv)
-    qApp.setApplicationName('efck-chat-keyboard')
-    qApp.setApplicationDisplayName('Efck Chat Keyboard')
-    qApp.setApplicationVersion(__version__)
-
-# Need live qApp before we query platform
-assert QApplication.instance()
-PLATFORM = QGuiApplication.platformName()
-IS_MACOS = PLATFORM == 'cocoa'
-IS_WAYLAND = PLATFORM == 'wayland'
-IS_WIDOWS = PLATFORM == 'windows'
-IS_X11 = PLATFORM == 'xcb'
-
-assert QApplication.instance()
-CONFIG_DIRS: list[str] = QStandardPaths.standardLocations(QStandardPaths.StandardLocation.AppConfigLocation)
+# Qt is only imported, and QApplication constructed, on import of `.qt`
+# or first access of these names, so that headless parts of the package
+# (e.g. `filter_cli`) don't require Qt or a display
+_QT_NAMES = ('qApp', 'PLATFORM', 'IS_MACOS', 'IS_WAYLAND', 'IS_WIDOWS', 'IS_X11', 'CONFIG_DIRS')
+
+
+def __getattr__(name):
+    if name not in _QT_NAMES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    with _phase('import Qt'):
+        from . import qt  # noqa: F401  # Calls `_init_qt()`
+    return globals()[name]
+
+
+def _init_qt(qt):
+    """Construct QApplication and set Qt-dependent globals. Called by `qt` module `qt` on import."""
+    global qApp, PLATFORM, IS_MACOS, IS_WAYLAND, IS_WIDOWS, IS_X11, CONFIG_DIRS
+
+    qApp = qt.QApplication.instance()
+    if not qApp:
+        with _phase('construct QApplication'):
+            qApp = qt.QApplication(_sys.argv)
+        qApp.setApplicationName(APP_NAME)
+        qApp.setApplicationDisplayName('Efck Chat Keyboard')
+        qApp.setApplicationVersion(__version__)
+
+    # Need live qApp before we query platform
+    PLATFORM = qt.QGuiApplication.platformName()
+    IS_MACOS = PLATFORM == 'cocoa'
+    IS_WAYLAND = PLATFORM == 'wayland'
+    IS_WIDOWS = PLATFORM == 'windows'
+    IS_X11 = PLATFORM == 'xcb'
+
+    CONFIG_DIRS = qt.QStandardPaths.standardLocations(qt.QStandardPaths.StandardLocation.AppConfigLocation)
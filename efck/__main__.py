@@ -5,13 +5,17 @@ import time
 import tempfile
 from pathlib import Path
 
-from . import __version__, CONFIG_DIRS, cli_args
-from .qt import QApplication, QT_API, QT_VERSION_STR
+from . import APP_NAME, __version__, cli_args, profiling
 
 logger = logging.getLogger(__name__)
 
+# Subcommand that runs `filter_cli` instead of the GUI, without Qt
+FILTER_COMMAND = 'filter'
+
 
 def parse_args():
+    from .qt import QApplication
+
     app_name = QApplication.instance().applicationName()
     parser = argparse.ArgumentParser(
         prog=app_name,
@@ -22,9 +26,18 @@ def parse_args():
         GIF meme selection etc. (extensible architecture).
         Upon activation, it 'pastes' your selection into the previously active
         (focused) window, such as a web browser or a desktop chat app or similar.
-        ''')
+        ''',
+        epilog=f'Run `%(prog)s {FILTER_COMMAND} --help` for transforming text with the filters '
+               'from the command line, without the GUI.')
     parser.add_argument('--debug', action='store_const', dest='log_level', const=logging.DEBUG,
                         default=logging.ERROR, help='Print debug messages to stderr')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Stay resident in the background after activation for instant re-show. '
+                             'If a resident instance is already running, just re-show its window.')
+    parser.add_argument('--profile-startup', nargs='?', metavar='FILE',
+                        const=Path(tempfile.gettempdir()) / f'{app_name}-startup-{time.strftime("%Y%m%dT%H%M%S")}.json',
+                        help='Time the startup phases until the window is first painted, '
+                             'write a JSON report into FILE (default: temp dir) and exit')
     args = parser.parse_args()
     cli_args[:] = [args]
 
@@ -44,7 +57,22 @@ def parse_args():
 
 
 def main():
+    if sys.argv[1:2] == [FILTER_COMMAND]:
+        from .filter_cli import main as filter_main
+
+        sys.exit(filter_main(sys.argv[2:], prog=f'{APP_NAME} {FILTER_COMMAND}'))
+
+    from . import CONFIG_DIRS
+    from .qt import QApplication, QT_API, QT_VERSION_STR
+
     parse_args()
+    args = cli_args[0]
+
+    if args.daemon:
+        from .daemon import notify_running_instance
+
+        if notify_running_instance():
+            sys.exit(0)
 
     logger.info('Qt version: %s %s, platform: %s', QT_API, QT_VERSION_STR, QApplication.platformName())
     logger.info('Config directories: %s', CONFIG_DIRS)
@@ -52,10 +80,47 @@ def main():
     from .gui import MainWindow
     from .config import load_config
 
-    load_config()
+    with profiling.phase('load config'):
+        load_config()
     window = MainWindow()
+    if args.daemon:
+        from .daemon import DaemonServer
+
+        window.is_daemon = True
+        QApplication.instance().setQuitOnLastWindowClosed(False)
+        DaemonServer(window)
+    if args.profile_startup:
+        _profile_until_first_paint(window, args.profile_startup)
     window.show()
     sys.exit(QApplication.instance().exec())
 
 
-main()
+def _profile_until_first_paint(window, report_file):
+    from .qt import QApplication, QEvent, QObject, QT_API, QT_VERSION_STR, QTimer
+
+    tab = window.current_tab
+    widget = tab.view.viewport() if tab else window
+    start = profiling.now()
+
+    def finish():
+        profiling.record('show until first paint', start)
+        profiling.write_report(report_file, version=__version__, qt_api=QT_API, qt_version=QT_VERSION_STR)
+        QApplication.instance().quit()
+
+    class FirstPaintFilter(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint:
+                obj.removeEventFilter(self)
+                # Finish after the paint event is handled
+                QTimer.singleShot(0, finish)
+            return False
+
+    widget.installEventFilter(FirstPaintFilter(widget))
+
+
+if __name__ == '__main__':
+    import multiprocessing
+
+    # Frozen (PyInstaller) processes spawned by `multiprocessing` run filters, not the app
+    multiprocessing.freeze_support()
+    main()
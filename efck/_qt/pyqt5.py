@@ -2,14 +2,16 @@ from PyQt5.QtCore import (
     QAbstractItemModel,
     QAbstractListModel,
     QBuffer,
+    QEvent,
     QItemSelectionModel,
     QLocale,
+    QLockFile,
     QMimeData,
     QModelIndex,
+    QObject,
     QPoint,
     QRect,
     QSize,
-    QSortFilterProxyModel,
     QStandardPaths,
     Qt,
     QThread,
@@ -24,6 +26,7 @@ from PyQt5.QtGui import (
     QDrag,
     QFont,
     QFontDatabase,
+    QFontInfo,
     QFontMetrics,
     QGuiApplication,
     QIcon,
@@ -36,16 +39,11 @@ from PyQt5.QtGui import (
     QPalette,
     QPen,
     QPixmap,
+    QRawFont,
     QResizeEvent,
     QStaticText,
     QTextOption,
 )
-from PyQt5.QtNetwork import (
-    QNetworkAccessManager,
-    QNetworkReply,
-    QNetworkRequest,
-)
-from PyQt5.QtTest import QTest
 from PyQt5.QtWidgets import (
     QApplication,
     QCheckBox,
@@ -67,3 +65,15 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
+
+# Imported by efck.qt on first use of any of the names
+_LAZY_IMPORTS = {
+    'PyQt5.QtNetwork': (
+        'QLocalServer',
+        'QLocalSocket',
+        'QNetworkAccessManager',
+        'QNetworkReply',
+        'QNetworkRequest',
+    ),
+    'PyQt5.QtTest': ('QTest',),
+}
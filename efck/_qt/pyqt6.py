@@ -2,14 +2,16 @@ from PyQt6.QtCore import (
     QAbstractItemModel,
     QAbstractListModel,
     QBuffer,
+    QEvent,
     QItemSelectionModel,
     QLocale,
+    QLockFile,
     QMimeData,
     QModelIndex,
+    QObject,
     QPoint,
     QRect,
     QSize,
-    QSortFilterProxyModel,
     QStandardPaths,
     Qt,
     QThread,
@@ -24,6 +26,7 @@ from PyQt6.QtGui import (
     QDrag,
     QFont,
     QFontDatabase,
+    QFontInfo,
     QFontMetrics,
     QGuiApplication,
     QIcon,
@@ -36,16 +39,11 @@ from PyQt6.QtGui import (
     QPalette,
     QPen,
     QPixmap,
+    QRawFont,
     QResizeEvent,
     QStaticText,
     QTextOption,
 )
-from PyQt6.QtNetwork import (
-    QNetworkAccessManager,
-    QNetworkReply,
-    QNetworkRequest,
-)
-from PyQt6.QtTest import QTest
 from PyQt6.QtWidgets import (
     QApplication,
     QCheckBox,
@@ -67,3 +65,15 @@ from PyQt6.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
+
+# Imported by efck.qt on first use of any of the names
+_LAZY_IMPORTS = {
+    'PyQt6.QtNetwork': (
+        'QLocalServer',
+        'QLocalSocket',
+        'QNetworkAccessManager',
+        'QNetworkReply',
+        'QNetworkRequest',
+    ),
+    'PyQt6.QtTest': ('QTest',),
+}
@@ -2,14 +2,16 @@ from PySide6.QtCore import (
     QAbstractItemModel,
     QAbstractListModel,
     QBuffer,
+    QEvent,
     QItemSelectionModel,
     QLocale,
+    QLockFile,
     QMimeData,
     QModelIndex,
+    QObject,
     QPoint,
     QRect,
     QSize,
-    QSortFilterProxyModel,
     QStandardPaths,
     Qt,
     QThread,
@@ -27,6 +29,7 @@ from PySide6.QtGui import (
     QDrag,
     QFont,
     QFontDatabase,
+    QFontInfo,
     QFontMetrics,
     QGuiApplication,
     QIcon,
@@ -39,16 +42,11 @@ from PySide6.QtGui import (
     QPalette,
     QPen,
     QPixmap,
+    QRawFont,
     QResizeEvent,
     QStaticText,
     QTextOption,
 )
-from PySide6.QtNetwork import (
-    QNetworkAccessManager,
-    QNetworkReply,
-    QNetworkRequest,
-)
-from PySide6.QtTest import QTest
 from PySide6.QtWidgets import (
     QApplication,
     QCheckBox,
@@ -70,3 +68,15 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
+
+# Imported by efck.qt on first use of any of the names
+_LAZY_IMPORTS = {
+    'PySide6.QtNetwork': (
+        'QLocalServer',
+        'QLocalSocket',
+        'QNetworkAccessManager',
+        'QNetworkReply',
+        'QNetworkRequest',
+    ),
+    'PySide6.QtTest': ('QTest',),
+}
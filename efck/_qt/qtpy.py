@@ -3,13 +3,15 @@ from qtpy.QtCore import (
     QAbstractListModel,
     QItemSelectionModel,
     QBuffer,
+    QEvent,
     QLocale,
+    QLockFile,
     QMimeData,
     QModelIndex,
+    QObject,
     QPoint,
     QRect,
     QSize,
-    QSortFilterProxyModel,
     QStandardPaths,
     Qt,
     QThread,
@@ -24,6 +26,7 @@ from qtpy.QtGui import (
     QDrag,
     QFont,
     QFontDatabase,
+    QFontInfo,
     QFontMetrics,
     QGuiApplication,
     QIcon,
@@ -36,16 +39,11 @@ from qtpy.QtGui import (
     QPalette,
     QPen,
     QPixmap,
+    QRawFont,
     QResizeEvent,
     QStaticText,
     QTextOption,
 )
-from qtpy.QtNetwork import (
-    QNetworkAccessManager,
-    QNetworkReply,
-    QNetworkRequest,
-)
-from qtpy.QtTest import QTest
 from qtpy.QtWidgets import (
     QApplication,
     QCheckBox,
@@ -67,3 +65,15 @@ from qtpy.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
+
+# Imported by efck.qt on first use of any of the names
+_LAZY_IMPORTS = {
+    'qtpy.QtNetwork': (
+        'QLocalServer',
+        'QLocalSocket',
+        'QNetworkAccessManager',
+        'QNetworkReply',
+        'QNetworkRequest',
+    ),
+    'qtpy.QtTest': ('QTest',),
+}
@@ -1,10 +1,9 @@
+import copy
 import json
 import logging
 import os
 from pathlib import Path
 
-from .tabs import EmojiTab
-
 logger = logging.getLogger(__name__)
 
 _skin_tone = {
@@ -26,11 +25,21 @@ _gender = {
     'man': 0,
     'woman': 0,
 }
+_search = {
+    'semantic': 0,
+}
 _emoji_filters = {
     'Skin': _skin_tone,
     'Hair': _hair_style,
     'Gender': _gender,
 }
+_emoji_tab = {
+    **_emoji_filters,
+    'Search': _search,
+}
+_filters_tab = {
+    'chains': ['bold+underline', 'monospace+strikethrough'],
+}
 # Global config object. This exact object in this module is updated
 # and queried and synced with user's preferences.
 # Below are the defaults:
@@ -39,7 +48,8 @@ config_state = {
     'window_geometry': [360, 400],
     'zoom': 100,
     'force_clipboard': False,
-    EmojiTab.__name__: _emoji_filters,
+    'EmojiTab': _emoji_tab,
+    'FiltersTab': _filters_tab,
 }
 
 
@@ -64,7 +74,18 @@ def load_config():
         logger.debug('User config: %s', obj)
     else:
         logger.info('No prior config file. Will use built-in defaults.')
-    config_state.update(obj or {})
+    obj = obj or {}
+    # Add defaults missing from configs of earlier versions
+    _merge_defaults(obj, config_state)
+    config_state.update(obj)
+
+
+def _merge_defaults(config, defaults):
+    for key, value in defaults.items():
+        if key not in config:
+            config[key] = copy.deepcopy(value)
+        elif isinstance(value, dict) and isinstance(config[key], dict):
+            _merge_defaults(config[key], value)
 
 
 def dump_config():
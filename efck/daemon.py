@@ -0,0 +1,74 @@
+"""
+Resident (daemon) mode.
+
+The first `efck-chat-keyboard --daemon` keeps its window, tab models
+and caches alive and merely hides the window upon activation or focus
+loss. Subsequent `--daemon` invocations connect to it over a local
+socket, ask it to re-show the window and exit immediately.
+"""
+import getpass
+import logging
+
+from .qt import *
+from .qt import QLocalServer, QLocalSocket  # Lazily imported
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT_MS = 300
+
+
+def server_name():
+    app_name = QApplication.instance().applicationName()
+    try:
+        user = getpass.getuser()
+    except Exception:  # No username in env or passwd
+        user = 'user'
+    return f'{app_name}-{user}'
+
+
+def notify_running_instance(command=b'show') -> bool:
+    """Send `command` to a running daemon. Return True if one was reached."""
+    socket = QLocalSocket()
+    socket.connectToServer(server_name())
+    if not socket.waitForConnected(CONNECT_TIMEOUT_MS):
+        logger.info('No running instance: %s', socket.errorString())
+        return False
+    socket.write(command + b'\n')
+    socket.flush()
+    socket.waitForBytesWritten(CONNECT_TIMEOUT_MS)
+    socket.disconnectFromServer()
+    logger.info('Notified running instance: %s', command)
+    return True
+
+
+class DaemonServer(QLocalServer):
+    """Listens for commands from client invocations and dispatches them to the window."""
+    def __init__(self, window):
+        super().__init__(parent=window)
+        self.window = window
+        self.newConnection.connect(self._on_new_connection)
+        name = server_name()
+        if not self.listen(name):
+            # Stale socket file left over by a crashed instance
+            logger.info('Removing stale server "%s": %s', name, self.errorString())
+            QLocalServer.removeServer(name)
+            if not self.listen(name):
+                logger.error('Cannot listen on "%s": %s', name, self.errorString())
+        logger.info('Daemon listening on "%s"', self.fullServerName())
+
+    def _on_new_connection(self):
+        while self.hasPendingConnections():
+            socket = self.nextPendingConnection()
+            socket.readyRead.connect(lambda socket=socket: self._on_ready_read(socket))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def _on_ready_read(self, socket):
+        while socket.canReadLine():
+            command = socket.readLine().data().strip()
+            logger.debug('Daemon command: %s', command)
+            if command == b'show':
+                self.window.reshow()
+            elif command == b'quit':
+                QApplication.instance().quit()
+            else:
+                logger.warning('Unknown daemon command: %s', command)
@@ -1,6 +1,13 @@
+import hashlib
 import logging
+import os
+import pickle
 import re
+import tempfile
+from array import array
+from collections.abc import Sequence
 from pathlib import Path
+from typing import Iterator, Optional
 
 try:
     import unicodedata2 as unicodedata
@@ -16,18 +23,183 @@ EMOJI_ORDERING_FILE = Path(__file__).parent / 'emoji-ordering.txt'
 # Alt keywords as used in GitHub, Trac, Redmine, Trello, Zendesk, Slack,
 # Discourse, Discord, Bitbucket, Gitter, YouTube, Mattermost ...
 EMOJI_SHORTCODES_FILE = Path(__file__).parent / 'emoji-shortcodes.txt'
+EMOJI_CUSTOM_STRINGS_FILENAME = 'emoji-custom-strings.txt'
 
+# Bump whenever the emoji processing below changes its output
+CACHE_VERSION = 4
 
-def enum_emojis():
-    from .config import config_state, _skin_tone
-    from .tabs.emoji import EmojiTab
+
+class EmojiTable(Sequence):
+    """
+    Compact, read-only columnar store of emoji records
+    `(emoji, name, alt_name, shortcode, custom_str)`.
+
+    Each field is one contiguous string, with every record's value
+    terminated by a newline, and an `array('I')` of record start offsets.
+    Indexing a row slices out its record tuple in O(1).
+    """
+    FIELDS = ('emoji', 'name', 'alt_name', 'shortcode', 'custom_str')
+    SEPARATOR = '\n'
+
+    __slots__ = ('columns', '_len')
+
+    def __init__(self, records=()):
+        self._len = 0
+        #: List of `(blob, offsets)` pairs, one per field
+        self.columns = [('', array('I', [0])) for _ in self.FIELDS]
+        self.extend(records)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(self._len))]
+        if row < 0:
+            row += self._len
+        if not 0 <= row < self._len:
+            raise IndexError(row)
+        return tuple(blob[offsets[row]:offsets[row + 1] - 1]
+                     for blob, offsets in self.columns)
+
+    def extend(self, records):
+        """Append `records` at the end of the table."""
+        records = list(records)
+        self._len += len(records)
+        for i, (blob, offsets) in enumerate(self.columns):
+            values = [record[i] for record in records]
+            assert not any(self.SEPARATOR in value for value in values), values
+            for value in values:
+                offsets.append(offsets[-1] + len(value) + 1)
+            self.columns[i] = (blob + ''.join(value + self.SEPARATOR for value in values), offsets)
+
+    def field(self, row, i):
+        """Return field with index `i` of `row` (e.g. `field(row, 0)` is the emoji)."""
+        blob, offsets = self.columns[i]
+        return blob[offsets[row]:offsets[row + 1] - 1]
+
+    def __eq__(self, other):
+        if isinstance(other, EmojiTable):
+            return self.columns == other.columns
+        return NotImplemented
+
+    def __getstate__(self):
+        return self.columns, self._len
+
+    def __setstate__(self, state):
+        self.columns, self._len = state
+
+
+def enum_emojis() -> EmojiTable:
+    """
+    Return `EmojiTable` of all `(emoji, name, alt_name, shortcode, custom_str)` records.
+    Config filters don't apply here (see `emoji_variants`).
+    The processed result is cached on disk, invalidated by changes
+    to the source files or unicodedata version.
+    """
+    emojis = load_cached_emojis()
+    if emojis is None:
+        emojis = EmojiTable()
+        for chunk in iter_emoji_chunks():
+            emojis.extend(chunk)
+    return emojis
+
+
+def _sources():
     from .util import iter_config_dirs
 
-    # Invert emoji filters from options
-    should_skip_emoji = {k for filters in config_state[EmojiTab.__name__].values()
-                         for k, is_enabled in filters.items()
-                         if not is_enabled}
-    should_skip_emoji = re.compile(fr'(?:^|(?:[:,] ))\b(?:{"|".join(should_skip_emoji)})').search
+    custom_strings_files = [file for file in (dir / EMOJI_CUSTOM_STRINGS_FILENAME
+                                              for dir in iter_config_dirs('.'))
+                            if file.exists()]
+    key = _cache_key([EMOJI_ORDERING_FILE, EMOJI_SHORTCODES_FILE, *custom_strings_files])
+    return custom_strings_files, key
+
+
+def load_cached_emojis() -> Optional[EmojiTable]:
+    """Return the `EmojiTable` from disk cache if it is up-to-date, else None."""
+    *_, key = _sources()
+    return _load_cache(key)
+
+
+def iter_emoji_chunks(chunk_size=256) -> Iterator[list]:
+    """
+    Return an iterator of lists of (at most `chunk_size`) emoji records
+    in `EMOJI_ORDERING_FILE` order, i.e. most common groups first.
+    The iteration may proceed in a background thread.
+    Once exhausted, the disk cache is updated.
+    """
+    custom_strings_files, key = _sources()
+
+    def chunks():
+        emojis = EmojiTable()
+        chunk = []
+        for record in _iter_emojis(custom_strings_files):
+            chunk.append(record)
+            if len(chunk) == chunk_size:
+                emojis.extend(chunk)
+                yield chunk
+                chunk = []
+        if chunk:
+            emojis.extend(chunk)
+            yield chunk
+        _dump_cache(key, emojis)
+
+    return chunks()
+
+
+def _cache_file():
+    from .util import cache_dir
+
+    return cache_dir() / 'emoji.pickle'
+
+
+def _cache_key(files):
+    from . import __version__
+
+    key = [CACHE_VERSION, __version__, unicodedata.unidata_version]
+    for file in files:
+        stat = file.stat()
+        key.append((str(file), stat.st_mtime_ns, stat.st_size,
+                    hashlib.sha1(file.read_bytes()).hexdigest()))
+    return key
+
+
+def _load_cache(key):
+    try:
+        with open(_cache_file(), 'rb') as fd:
+            cached_key, emojis = pickle.load(fd)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning('Error loading emoji cache: %s: %s', e.__class__.__name__, e)
+        return None
+    if cached_key != key:
+        logger.info('Emoji cache is stale')
+        return None
+    logger.info('Loaded %d emoji from cache', len(emojis))
+    return emojis
+
+
+def _dump_cache(key, emojis):
+    file = _cache_file()
+    try:
+        os.makedirs(file.parent, exist_ok=True)
+        # Unique, in case another loader (e.g. of another instance) dumps concurrently
+        with tempfile.NamedTemporaryFile(dir=file.parent, prefix=file.stem, suffix='.tmp', delete=False) as fd:
+            try:
+                pickle.dump((key, emojis), fd, protocol=pickle.HIGHEST_PROTOCOL)
+            except BaseException:
+                fd.close()
+                os.unlink(fd.name)
+                raise
+        os.replace(fd.name, file)
+        logger.info('Emoji cache dumped to "%s"', file)
+    except OSError as e:
+        logger.warning('Error dumping emoji cache: %s', e)
+
+
+def _iter_emojis(custom_strings_files):
+    from .config import _skin_tone
 
     # Load GitHub/Slack emoji shortcodes
     with open(EMOJI_SHORTCODES_FILE, encoding='utf-8') as fd:
@@ -36,13 +208,11 @@ def enum_emojis():
 
     # Load custom emoji strings
     custom_strings = {}
-    for dir in iter_config_dirs('.'):
-        file = dir / 'emoji-custom-strings.txt'
-        if file.exists():
-            with open(file, encoding='utf-8') as fd:
-                custom_strings.update(line.split(maxsplit=1)
-                                      for line in (line.strip() for line in fd)
-                                      if line and not line.startswith('#'))
+    for file in custom_strings_files:
+        with open(file, encoding='utf-8') as fd:
+            custom_strings.update(line.split(maxsplit=1)
+                                  for line in (line.strip() for line in fd)
+                                  if line and not line.startswith('#'))
 
     # Chars present in the ordering file but not in the shortcodes file
     MODIFIER_CHARS = (
@@ -66,53 +236,37 @@ def enum_emojis():
         text = re.sub(r'\W{2,}', ' ', text)
         return text
 
-    emojis = []
-    known_man_names = set()
-
-    official_emoji = set()
     with open(EMOJI_ORDERING_FILE, encoding='utf-8') as fd:
-        for line in fd:
-            if line.startswith('#'):
-                continue
+        lines = [line for line in fd if not line.startswith('#')]
 
-            seq, unicode_version, emoji, name = re.match(r'(.+?) ; (.+?) # ([^ ]+) (.+)', line).groups()
-            official_emoji.add(emoji)
+    official_emoji = set()
+    for line in lines:
+        seq, unicode_version, emoji, name = re.match(r'(.+?) ; (.+?) # ([^ ]+) (.+)', line).groups()
+        official_emoji.add(emoji)
 
-            # Temporary workaround for country flags
-            name = name.lower()
+        # Temporary workaround for country flags
+        name = name.lower()
 
-            try:
-                alt_name = unicodedata.name(emoji, '').lower()
-                if alt_name == name:
-                    alt_name = ''
-            except (TypeError, SyntaxError):
+        try:
+            alt_name = unicodedata.name(emoji, '').lower()
+            if alt_name == name:
                 alt_name = ''
+        except (TypeError, SyntaxError):
+            alt_name = ''
 
-            emoji_normed = ''.join(ch for ch in emoji if ch not in MODIFIER_CHARS)
-            shortcode = shortcodes.pop(emoji_normed, '')
-
-            if name.startswith('man'):
-                known_man_names.add(name.split(':')[0])
-            if should_skip_emoji(name):
-                continue
+        emoji_normed = ''.join(ch for ch in emoji if ch not in MODIFIER_CHARS)
+        shortcode = shortcodes.pop(emoji_normed, '')
 
-            name = clean_desc(name)
-            alt_name = clean_desc(alt_name)
-            shortcode = clean_desc(shortcode)
-            custom_str = ' '.join(filter(None, (custom_strings.get(ch, '') for ch in emoji)))
+        name = clean_desc(name)
+        alt_name = clean_desc(alt_name)
+        shortcode = clean_desc(shortcode)
+        custom_str = ' '.join(filter(None, (custom_strings.get(ch, '') for ch in emoji)))
 
-            emojis.append((emoji, name, alt_name, shortcode, custom_str))
+        yield emoji, name, alt_name, shortcode, custom_str
 
     # All shortcodes were consumed
     assert not shortcodes, shortcodes
 
     # Trail with custom emoji sequences from the file
     for custom_emoji in custom_strings.keys() - official_emoji:
-        emojis.append((custom_emoji, '', '', '', custom_strings[custom_emoji]))
-
-    # Skip person in case of emojis for which either man or woman
-    # versions also exist ("health worker", "astronout" ...)
-    is_person_disabled = not config_state[EmojiTab.__name__]['Gender']['person']
-    if is_person_disabled:
-        emojis[:] = [i for i in emojis if f'man {i[1]}' not in known_man_names]
-    return emojis
+        yield custom_emoji, '', '', '', custom_strings[custom_emoji]
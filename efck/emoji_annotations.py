@@ -0,0 +1,165 @@
+"""
+Emoji keywords in other languages, from CLDR annotation files.
+
+CLDR annotation files (`common/annotations/<locale>.xml` and
+`common/annotationsDerived/<locale>.xml` from https://cldr.unicode.org,
+the latter e.g. renamed to `<locale>.derived.xml`) can be bundled with
+or dropped into `ANNOTATIONS_DIR` of the config dirs. Only files of the
+user's locales are used. Each is compiled once into an index file in the
+cache dir, of records `emoji<TAB>keyword<TAB>keyword ...<LF>`, which is
+memory-mapped and searched in place, so memory stays flat however many
+languages are installed.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+ANNOTATIONS_DIR = 'annotations'
+
+# Bump whenever the compiled format changes
+FORMAT_VERSION = 1
+_MAGIC = b'EFCK-ANNOTATIONS'
+
+# Annotations are of the base emoji, which also stand for their skin tones
+_NOT_IN_KEY = re.compile('[\N{EMOJI MODIFIER FITZPATRICK TYPE-1-2}-\N{EMOJI MODIFIER FITZPATRICK TYPE-6}'
+                         '\N{VARIATION SELECTOR-16}]')
+
+
+def emoji_key(emoji) -> str:
+    """Return `emoji` as annotated, i.e. without skin tone and emoji presentation selector."""
+    return _NOT_IN_KEY.sub('', emoji)
+
+
+def _locale_names(locales) -> set:
+    # "de_DE" loads "de_DE" and "de" files
+    names = set()
+    for name in locales:
+        names.add(name)
+        names.add(name.split('_')[0])
+    return names
+
+
+def _compile(source, target):
+    keywords = {}  # Emoji -> keywords, name first
+    for _, elem in ET.iterparse(source):
+        if elem.tag == 'annotation' and elem.get('cp') and elem.text:
+            strings = [' '.join(s.lower().split()) for s in elem.text.split('|')]
+            if '↑↑↑' in strings:  # Inherited from the parent locale
+                continue
+            emoji_keywords = keywords.setdefault(elem.get('cp'), [])
+            if elem.get('type') == 'tts':
+                emoji_keywords[:0] = strings
+            else:
+                emoji_keywords.extend(strings)
+        elem.clear()
+    stat = source.stat()
+    tmp_file = target.with_suffix('.tmp')
+    with open(tmp_file, 'w', encoding='utf-8', newline='\n') as fd:
+        fd.write(f'{_MAGIC.decode()} {FORMAT_VERSION} {stat.st_mtime_ns} {stat.st_size}\n')
+        for emoji, strings in keywords.items():
+            fd.write('\t'.join([emoji, *dict.fromkeys(filter(None, strings))]) + '\n')
+    os.replace(tmp_file, target)
+    logger.info('Compiled %d emoji annotations from "%s"', len(keywords), source)
+
+
+class Annotations:
+    """Memory-mapped compiled index of CLDR annotation file `source`."""
+    def __init__(self, source, index_file):
+        self.source = Path(source)
+        index_file = Path(index_file)
+        if not self._is_fresh(index_file):
+            index_file.parent.mkdir(parents=True, exist_ok=True)
+            _compile(self.source, index_file)
+        with open(index_file, 'rb') as fd:
+            self._mmap = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        self._start = self._mmap.find(b'\n') + 1  # Skip header
+        self._records = self._index_records()  # Emoji key -> (start, end) of its record
+
+    def _is_fresh(self, index_file) -> bool:
+        try:
+            with open(index_file, 'rb') as fd:
+                header = fd.readline().split()
+        except OSError:
+            return False
+        stat = self.source.stat()
+        return header == [_MAGIC, *(str(i).encode() for i in (FORMAT_VERSION, stat.st_mtime_ns, stat.st_size))]
+
+    def _index_records(self) -> dict:
+        mm = self._mmap
+        records = {}
+        start = self._start
+        end = mm.find(b'\n', start)
+        while end != -1:
+            emoji_end = mm.find(b'\t', start, end)
+            emoji = mm[start:end if emoji_end == -1 else emoji_end].decode()
+            records.setdefault(emoji_key(emoji), (start, end))
+            start = end + 1
+            end = mm.find(b'\n', start)
+        return records
+
+    def items(self):
+        """Yield `(emoji, keywords)` of all annotated emoji."""
+        for line in self._mmap[self._start:].decode().splitlines():
+            emoji, *strings = line.split('\t')
+            yield emoji, strings
+
+    def search(self, words, among=None) -> set:
+        """
+        Return emoji with any one keyword containing all (lowercase) `words`,
+        only of `among` emoji (as by `emoji_key()`), if given.
+        """
+        found = set()
+        if among is not None:
+            # Check only their records
+            for key in among:
+                span = self._records.get(key)
+                if span is not None:
+                    self._check_record(*span, words, found)
+            return found
+        mm = self._mmap
+        # Find records containing the longest word, then check them whole
+        needle = max(words, key=len).encode()
+        pos = mm.find(needle, self._start)
+        while pos != -1:
+            start = mm.rfind(b'\n', 0, pos) + 1
+            end = mm.find(b'\n', pos)
+            self._check_record(start, end, words, found)
+            pos = mm.find(needle, end)
+        return found
+
+    def _check_record(self, start, end, words, found):
+        emoji, *strings = self._mmap[start:end].decode().split('\t')
+        if any(all(word in string for word in words) for string in strings):
+            found.add(emoji)
+
+
+def load_annotations(locales, dirs=None, index_dir=None) -> list:
+    """
+    Return `Annotations` of CLDR files in `dirs` (default: `ANNOTATIONS_DIR`
+    of the config dirs) for `locales` (e.g. `util.system_locales()`),
+    compiled into `index_dir` (default: in the cache dir) as needed.
+    """
+    from .util import cache_dir, iter_config_dirs
+
+    if dirs is None:
+        dirs = iter_config_dirs(ANNOTATIONS_DIR)
+    if index_dir is None:
+        index_dir = cache_dir() / ANNOTATIONS_DIR
+    names = _locale_names(locales)
+    annotations = []
+    for dir in dirs:
+        for file in sorted(Path(dir).glob('*.xml')):
+            if file.name.split('.')[0] not in names:
+                continue
+            digest = hashlib.sha1(str(file.resolve()).encode()).hexdigest()[:12]
+            try:
+                annotations.append(Annotations(file, Path(index_dir) / f'{file.stem}-{digest}.idx'))
+            except (OSError, ET.ParseError) as e:
+                logger.warning('Error loading emoji annotations "%s": %s', file, e)
+    return annotations
@@ -0,0 +1,117 @@
+"""
+Typo-tolerant emoji search.
+
+The distinct words of all emoji strings (names, shortcodes, custom
+strings ...) form a small vocabulary, indexed by character trigrams.
+A query word's candidate corrections are the vocabulary words that
+share enough trigrams with it to possibly be within `max_distance()`
+edits, which is then verified with a bounded edit distance. Matching
+rows of the corrections are looked up in the exact `EmojiIndex`,
+most selective words first, each only among the rows matched so far.
+"""
+import logging
+from collections import Counter, defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+def _trigrams(word):
+    # No end marker, since the query word may be a prefix of the intended one
+    word = f'^{word}'
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def prefix_edit_distance(word, other, max_distance) -> int:
+    """
+    Return the Levenshtein distance of `word` to the closest prefix
+    of `other`, or `max_distance + 1` if greater than `max_distance`.
+    """
+    if len(other) < len(word) - max_distance:
+        return max_distance + 1
+    previous = list(range(len(other) + 1))
+    for i, char in enumerate(word, 1):
+        current = [i]
+        for j, other_char in enumerate(other, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (char != other_char)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(min(previous), max_distance + 1)
+
+
+class FuzzyIndex:
+    """Approximate matching over `emoji_index.EmojiIndex` `index`."""
+    #: Shorter query words are not corrected
+    MIN_WORD_LENGTH = 3
+    #: Max number of corrections looked up per query word
+    MAX_CORRECTIONS = 5
+
+    def __init__(self, index):
+        self.index = index
+        self._frequency = Counter()  # Vocabulary word -> number of occurrences
+        self._postings = defaultdict(list)  # Trigram -> vocabulary words
+        self._n_indexed = 0
+        self.update()
+
+    def update(self):
+        """Add words of rows appended to the table since the last update."""
+        emoji_data = self.index.emoji_data
+        # Split the table's field buffers (but emoji) directly,
+        # as records are newline-separated
+        words = Counter()
+        for blob, offsets in emoji_data.columns[1:]:
+            words.update(blob[offsets[self._n_indexed]:].split())
+        frequency = self._frequency
+        for word, n in words.items():
+            if word not in frequency:
+                for gram in _trigrams(word):
+                    self._postings[gram].append(word)
+            frequency[word] += n
+        self._n_indexed = len(emoji_data)
+        logger.debug('Indexed vocabulary of %d words', len(frequency))
+
+    @staticmethod
+    def max_distance(word) -> int:
+        return 1 if len(word) < 6 else 2
+
+    def corrections(self, word) -> list:
+        """Return vocabulary words that `word` may be a misspelling of, closest first."""
+        if len(word) < self.MIN_WORD_LENGTH:
+            return []
+        grams = _trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        # An edit changes at most three trigrams
+        max_distance = self.max_distance(word)
+        min_shared = len(grams) - 3 * max_distance
+        found = []
+        for candidate, n_shared in shared.items():
+            if n_shared >= min_shared:
+                distance = prefix_edit_distance(word, candidate, max_distance)
+                if distance <= max_distance:
+                    found.append((distance, -self._frequency[candidate], -n_shared, candidate))
+        found.sort()
+        return [candidate for *_, candidate in found[:self.MAX_CORRECTIONS]]
+
+    def search(self, words) -> list:
+        """
+        Return rows that match all `words`, each either exactly or by one
+        of its corrections, rows of closer corrections first.
+        Return an empty list if no word is long enough to be corrected.
+        """
+        if all(len(word) < self.MIN_WORD_LENGTH for word in words):
+            return []  # Nothing to correct
+        ranks = None  # Row -> sum of ranks of the corrections it matched by
+        for word in sorted(words, key=len, reverse=True):
+            word_ranks = {}
+            for rank, correction in enumerate([word, *self.corrections(word)]):
+                for row in self.index.search([correction], within=ranks):
+                    word_ranks.setdefault(row, rank)
+            ranks = (word_ranks if ranks is None else
+                     {row: rank + word_ranks[row] for row, rank in ranks.items() if row in word_ranks})
+            if not ranks:
+                return []
+        return sorted(ranks or (), key=lambda row: (ranks[row], row))
@@ -0,0 +1,187 @@
+import heapq
+import logging
+from array import array
+from collections import defaultdict
+from functools import partial
+
+from .emoji_annotations import emoji_key
+
+logger = logging.getLogger(__name__)
+
+
+def first_matching_string(strings, words) -> str:
+    # First of the strings (name, alt_name, shortcode) that contains
+    # ALL space-separated parts in any order
+    return next((s for s in strings
+                 if all(w in s for w in words)), None)
+
+
+class EmojiIndex:
+    """
+    Inverted index of character n-grams over all the strings of the
+    emoji data tuples.
+
+    A row can only match a query if it contains every n-gram of every
+    query word. Therefore, the rows of the shortest posting list among
+    the query words' n-grams are the only candidates that need
+    to be checked with `first_matching_string()`, which keeps the exact
+    "all words in any one string" semantics of the plain scan.
+    Words shorter than `NGRAM` can't be looked up and, if they are all
+    there is, match most rows anyway, so those queries scan all rows.
+
+    `rank()` orders matches by relevance, scored from the space-padded
+    strings of each row, kept alongside the n-grams.
+
+    Rows whose emoji match in any of `emoji_annotations.Annotations`
+    `annotations` (keywords in the user's languages) match as well,
+    unless all query words are shorter than `NGRAM`.
+    """
+    NGRAM = 3
+
+    #: Number of matches ordered by relevance. The rest keep table order.
+    RANK_TOP_K = 100
+    #: Relevance of a query word in a field, by field `(name, alt_name, shortcode, custom_str)`
+    #: and by match type `(whole word, word prefix, inner substring)`
+    FIELD_SCORES = (
+        (30, 20, 10),
+        (15, 10, 5),
+        (15, 10, 5),
+        (15, 10, 5),
+    )
+    #: Relevance of the whole query being the shortcode, or a word being a custom string
+    EXACT_SHORTCODE_SCORE = 100
+    EXACT_CUSTOM_STR_SCORE = 50
+
+    def __init__(self, emoji_data, annotations=()):
+        """Build the index from `emoji.EmojiTable` `emoji_data`."""
+        self.emoji_data = emoji_data
+        self.annotations = list(annotations)
+        self._postings = defaultdict(partial(array, 'I'))
+        self._padded = []  # Row -> space-padded (name, alt_name, shortcode, custom_str)
+        self._annotated_rows = defaultdict(list)  # Annotated emoji -> rows, if any annotations
+        self._n_indexed = 0
+        self.update()
+
+    def update(self):
+        """Index rows appended to `emoji_data` since the last update."""
+        n = self.NGRAM
+        postings = self._postings
+        # Slice the grams directly out of the table's contiguous
+        # field buffers, skipping the record separators
+        columns = self.emoji_data.columns
+        for row in range(self._n_indexed, len(self.emoji_data)):
+            grams = set()
+            for blob, offsets in columns:
+                grams.update({blob[i:i + n] for i in range(offsets[row], offsets[row + 1] - n)})
+            for gram in grams:
+                postings[gram].append(row)
+            self._padded.append(tuple(f' {s} ' for s in self.emoji_data[row][1:]))
+            if self.annotations:
+                self._annotated_rows[emoji_key(self.emoji_data.field(row, 0))].append(row)
+        self._n_indexed = len(self.emoji_data)
+        logger.debug('Indexed %d emoji into %d %d-grams',
+                     self._n_indexed, len(postings), n)
+
+    def set_annotations(self, annotations):
+        """Match `annotations` as well from now on, e.g. once loaded in the background."""
+        self.annotations = list(annotations)
+        self._annotated_rows.clear()
+        if self.annotations:
+            for row in range(self._n_indexed):
+                self._annotated_rows[emoji_key(self.emoji_data.field(row, 0))].append(row)
+
+    def candidates(self, words):
+        """Return ascending rows that may match `words`."""
+        n = self.NGRAM
+        shortest = None
+        for word in words:
+            for i in range(len(word) - n + 1):
+                rows = self._postings.get(word[i:i + n], ())
+                if shortest is None or len(rows) < len(shortest):
+                    shortest = rows
+                    if not rows:
+                        return ()
+        return range(len(self.emoji_data)) if shortest is None else shortest
+
+    def search(self, words, within=None):
+        """
+        Return ascending rows of emoji matching all `words` in any one of their strings.
+
+        If `within` rows are given (e.g. a previous result that
+        the query `refines()`), only those are considered.
+        """
+        if not words:
+            return list(range(len(self.emoji_data))) if within is None else list(within)
+        rows = self.candidates(words)
+        if within is not None and len(within) <= len(rows):
+            rows = within
+        elif len(words) == 1 and len(words[0]) == self.NGRAM:
+            # Single n-gram's posting list is exact
+            return self._with_annotated(list(rows), words, within)
+        emoji_data = self.emoji_data
+        return self._with_annotated([row for row in rows
+                                     if first_matching_string(emoji_data[row], words)],
+                                    words, within)
+
+    def _with_annotated(self, rows, words, within):
+        # Like for rows, short words would match most keywords
+        if not self.annotations or max(map(len, words)) < self.NGRAM:
+            return rows
+        among = None
+        if within is not None:
+            field = self.emoji_data.field
+            among = {emoji_key(field(row, 0)) for row in within}
+        annotated = set()
+        for annotations in self.annotations:
+            for emoji in annotations.search(words, among):
+                annotated.update(self._annotated_rows.get(emoji_key(emoji), ()))
+        if within is not None:
+            annotated.intersection_update(within)
+        annotated.difference_update(rows)
+        return sorted(rows + list(annotated)) if annotated else rows
+
+    def rank(self, rows, words) -> list:
+        """
+        Return matching `rows` with the `RANK_TOP_K` most relevant
+        to `words` first, in order of relevance, then the rest in order.
+        """
+        if not words:
+            return list(rows)
+        padded = self._padded
+        query = f' {" ".join(words)} '
+        words = [(f' {word} ', f' {word}', word) for word in words]
+        field_scores = self.FIELD_SCORES
+
+        def key(row):
+            strings = padded[row]
+            score = self.EXACT_SHORTCODE_SCORE if strings[2] == query else 0
+            for whole, prefix, inner in words:
+                if whole in strings[3]:
+                    score += self.EXACT_CUSTOM_STR_SCORE
+                best = 0
+                for string, (whole_score, prefix_score, inner_score) in zip(strings, field_scores):
+                    if whole in string:
+                        best = max(best, whole_score)
+                        break  # Fields are in order of relevance
+                    if prefix in string:
+                        best = max(best, prefix_score)
+                    elif inner in string:
+                        best = max(best, inner_score)
+                score += best
+            # Higher score, then shorter name, then table order
+            return -score, len(strings[0]), row
+
+        top = heapq.nsmallest(self.RANK_TOP_K, rows, key=key)
+        if len(top) == len(rows):
+            return top
+        top_rows = set(top)
+        return top + [row for row in rows if row not in top_rows]
+
+
+def refines(old_words, new_words) -> bool:
+    """
+    Return True if the query `new_words` matches a subset of what `old_words` matches,
+    i.e. each old word is contained in some new word.
+    """
+    return all(any(old in new for new in new_words)
+               for old in old_words)
@@ -0,0 +1,196 @@
+"""
+Semantic emoji search by TF-IDF vector similarity. Requires NumPy.
+
+Each emoji row is a document of its strings (name, alt_name,
+shortcode, custom strings) and annotation keywords, vectorized into
+TF-IDF weights of its words and character trigrams, so that e.g.
+"celebrating" is close to "celebration". The L2-normalized row vectors
+form a sparse float16 matrix, cached in `SEMANTIC_CACHE_FILENAME` in the
+cache dir. A query is vectorized the same way and rows are scored by
+cosine similarity. The query is then expanded with the vectors of the
+best few rows (pseudo-relevance feedback) and rescored, which also finds
+rows that only share words with the best matches.
+"""
+import hashlib
+import logging
+import math
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    # Semantic search is optional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_FILENAME = 'emoji-semantic.npz'
+
+# Bump whenever the vectorization below changes its output
+FORMAT_VERSION = 1
+
+# Prefix of word features, distinguishing them from trigrams
+_WORD = '\t'
+
+
+def is_available() -> bool:
+    return np is not None
+
+
+def _features(text) -> Counter:
+    features = Counter()
+    for word in text.split():
+        features[_WORD + word] += 1
+        padded = f' {word} '
+        features.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+def _documents(emoji_data, annotations):
+    keywords = {}
+    for annotation in annotations:
+        for emoji, strings in annotation.items():
+            keywords.setdefault(emoji, []).extend(strings)
+    from .emoji_annotations import emoji_key
+
+    for row in range(len(emoji_data)):
+        emoji, *strings = emoji_data[row]
+        yield ' '.join([*strings, *keywords.get(emoji_key(emoji), ())])
+
+
+def _cache_key(emoji_data, annotations) -> str:
+    digest = hashlib.sha1(str(FORMAT_VERSION).encode())
+    for blob, _ in emoji_data.columns:
+        digest.update(blob.encode())
+    for annotation in annotations:
+        stat = annotation.source.stat()
+        digest.update(f'{annotation.source}{stat.st_mtime_ns}{stat.st_size}'.encode())
+    return digest.hexdigest()
+
+
+class SemanticIndex:
+    """TF-IDF vectors of the rows of `emoji.EmojiTable` `emoji_data`."""
+    #: Max number of rows returned
+    TOP_K = 100
+    #: Rows less similar to the query are not returned
+    MIN_SIMILARITY = .25
+    #: Number of best rows whose vectors expand the query, and their weight
+    FEEDBACK_ROWS = 3
+    FEEDBACK_WEIGHT = .5
+
+    def __init__(self, emoji_data, annotations=(), cache_file=None):
+        """
+        Load vectors from `cache_file` (default: in the cache dir) if
+        up-to-date, else compute them from `emoji_data` and `emoji_annotations.Annotations`
+        `annotations`, and cache them.
+        """
+        assert np is not None, 'Semantic search requires NumPy'
+        if cache_file is None:
+            from .util import cache_dir
+
+            cache_file = cache_dir() / SEMANTIC_CACHE_FILENAME
+        annotations = list(annotations)
+        self._n_rows = len(emoji_data)
+        key = _cache_key(emoji_data, annotations)
+        arrays = self._load(cache_file, key)
+        if arrays is None:
+            arrays = self._vectorize(_documents(emoji_data, annotations))
+            self._dump(cache_file, key, arrays)
+        features, self._idf, self._row_ptr, self._feature_ids, self._values = arrays
+        self._feature_of = {feature: i for i, feature in enumerate(features.tolist())}
+        # Column-major copy, for scoring rows by query features
+        order = np.argsort(self._feature_ids, kind='stable')
+        self._col_ptr = np.concatenate([[0], np.cumsum(np.bincount(self._feature_ids, minlength=len(features)))])
+        self._col_rows = np.repeat(np.arange(self._n_rows, dtype=np.int32), np.diff(self._row_ptr))[order]
+        self._col_values = self._values[order].astype(np.float32)
+
+    @staticmethod
+    def _vectorize(documents):
+        feature_of = {}
+        row_lengths, feature_ids, counts = [], [], []
+        for document in documents:
+            features = _features(document)
+            row_lengths.append(len(features))
+            for feature, count in features.items():
+                feature_ids.append(feature_of.setdefault(feature, len(feature_of)))
+                counts.append(count)
+        n_rows = len(row_lengths)
+        feature_ids = np.array(feature_ids, dtype=np.int32)
+        row_ids = np.repeat(np.arange(n_rows), row_lengths)
+        idf = (np.log((1 + n_rows) / (1 + np.bincount(feature_ids, minlength=len(feature_of)))) + 1
+               ).astype(np.float32)
+        weights = (1 + np.log(np.array(counts, dtype=np.float32))) * idf[feature_ids]
+        norms = np.sqrt(np.bincount(row_ids, weights ** 2, minlength=n_rows))
+        weights /= np.maximum(norms, 1e-9)[row_ids]
+        row_ptr = np.concatenate([[0], np.cumsum(row_lengths)]).astype(np.int32)
+        return (np.array(list(feature_of)), idf, row_ptr, feature_ids, weights.astype(np.float16))
+
+    @staticmethod
+    def _load(cache_file, key):
+        try:
+            with np.load(cache_file) as npz:
+                if str(npz['key']) != key:
+                    logger.info('Semantic emoji index is stale')
+                    return None
+                return tuple(npz[name] for name in ('features', 'idf', 'row_ptr', 'feature_ids', 'values'))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning('Error loading semantic emoji index: %s: %s', e.__class__.__name__, e)
+            return None
+
+    @staticmethod
+    def _dump(cache_file, key, arrays):
+        features, idf, row_ptr, feature_ids, values = arrays
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix('.tmp.npz')
+            np.savez(tmp_file, key=key, features=features, idf=idf, row_ptr=row_ptr,
+                     feature_ids=feature_ids, values=values)
+            tmp_file.replace(cache_file)
+        except OSError as e:
+            logger.warning('Error dumping semantic emoji index: %s', e)
+
+    def _query_vector(self, words) -> dict:
+        vector = {}
+        for feature, count in _features(' '.join(words)).items():
+            i = self._feature_of.get(feature)
+            if i is not None:
+                vector[i] = (1 + math.log(count)) * float(self._idf[i])
+        return vector
+
+    def _scores(self, vector):
+        norm = math.sqrt(sum(weight ** 2 for weight in vector.values())) or 1
+        scores = np.zeros(self._n_rows, dtype=np.float32)
+        col_ptr, col_rows, col_values = self._col_ptr, self._col_rows, self._col_values
+        for i, weight in vector.items():
+            start, end = col_ptr[i], col_ptr[i + 1]
+            scores[col_rows[start:end]] += col_values[start:end] * (weight / norm)
+        return scores
+
+    def _top(self, scores, k):
+        k = min(k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[scores[top] >= self.MIN_SIMILARITY]
+        # Higher score, then table order
+        return top[np.lexsort((top, -scores[top]))].tolist()
+
+    def search(self, words) -> list:
+        """Return up to `TOP_K` rows most similar to `words`, most similar first."""
+        vector = self._query_vector(words)
+        if not vector:
+            return []
+        scores = self._scores(vector)
+        norm = math.sqrt(sum(weight ** 2 for weight in vector.values()))
+        feedback = self._top(scores, self.FEEDBACK_ROWS)
+        if feedback:
+            vector = {i: weight / norm for i, weight in vector.items()}
+            weight = self.FEEDBACK_WEIGHT / len(feedback)
+            for row in feedback:
+                start, end = self._row_ptr[row], self._row_ptr[row + 1]
+                for i, value in zip(self._feature_ids[start:end].tolist(), self._values[start:end].tolist()):
+                    vector[i] = vector.get(i, 0) + weight * value
+            scores = self._scores(vector)
+        return self._top(scores, self.TOP_K)
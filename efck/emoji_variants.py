@@ -0,0 +1,201 @@
+"""
+Skin tone, hair style and gender variants of emoji.
+
+Each `EmojiTable` row gets a bitmask of its attributes (skin tones, hair
+style, gender), computed once. Since only few distinct bitmasks occur,
+rows store the index of theirs in one byte, and filtering all rows by
+config is a single `bytes.translate()` of those with a table computed
+for the few distinct bitmasks. Options changes thus don't require
+re-enumerating emoji.
+
+Variants of one emoji (e.g. "health worker", "woman health worker" in
+medium skin tone, ...) form a family of rows, keyed by their sequence
+with skin tone modifiers and (of single-person emoji) gender markers
+removed. Views show, of each family, one variant per enabled gender:
+the one that best matches the user's skin tone preference.
+"""
+import logging
+import re
+from array import array
+
+logger = logging.getLogger(__name__)
+
+#: Skin tone modifiers by their name in `config._skin_tone`
+SKIN_TONES = {
+    'light skin tone': '\N{EMOJI MODIFIER FITZPATRICK TYPE-1-2}',
+    'medium-light skin tone': '\N{EMOJI MODIFIER FITZPATRICK TYPE-3}',
+    'medium skin tone': '\N{EMOJI MODIFIER FITZPATRICK TYPE-4}',
+    'medium-dark skin tone': '\N{EMOJI MODIFIER FITZPATRICK TYPE-5}',
+    'dark skin tone': '\N{EMOJI MODIFIER FITZPATRICK TYPE-6}',
+}
+#: Hair style components by their name in `config._hair_style`
+HAIR_STYLES = {
+    'red hair': '\N{EMOJI COMPONENT RED HAIR}',
+    'curly hair': '\N{EMOJI COMPONENT CURLY HAIR}',
+    'white hair': '\N{EMOJI COMPONENT WHITE HAIR}',
+    'bald': '\N{EMOJI COMPONENT BALD}',
+    'blond': '\N{PERSON WITH BLOND HAIR}',
+}
+# Genders as in `config._gender`
+PERSON, MAN, WOMAN = 'person', 'man', 'woman'
+
+#: Attribute bits, by their name in `config._emoji_filters`
+BITS = {name: 1 << i for i, name in enumerate([*SKIN_TONES, *HAIR_STYLES, PERSON, MAN, WOMAN])}
+SKIN_TONE_MASK = sum(BITS[name] for name in SKIN_TONES)
+GENDER_MASK = BITS[PERSON] | BITS[MAN] | BITS[WOMAN]
+
+_CHAR_BITS = {
+    **{char: BITS[name] for name, char in SKIN_TONES.items()},
+    **{char: BITS[name] for name, char in HAIR_STYLES.items()},
+    '\N{MAN}': BITS[MAN],
+    '\N{WOMAN}': BITS[WOMAN],
+}
+# Gender signs are markers only if joined, unlike the "♀" and "♂" emoji
+_GENDER_SIGN = re.compile('\N{ZERO WIDTH JOINER}([\N{MALE SIGN}\N{FEMALE SIGN}])')
+_SIGN_BITS = {'\N{MALE SIGN}': BITS[MAN], '\N{FEMALE SIGN}': BITS[WOMAN]}
+# Gender of e.g. "woman dancing", which has no such marker
+_NAME_GENDER = re.compile(fr'({PERSON}|{MAN}|{WOMAN})\b')
+_NOT_IN_FAMILY_KEY = re.compile(
+    f'[{"".join(SKIN_TONES.values())}\N{VARIATION SELECTOR-16}]|{_GENDER_SIGN.pattern}')
+_GENDER_TO_ADULT = str.maketrans({'\N{MAN}': '\N{ADULT}',
+                                  '\N{WOMAN}': '\N{ADULT}'})
+_PERSONS = re.compile('[\N{MAN}\N{WOMAN}\N{ADULT}]')
+
+#: Rank of rows excluded by config
+HIDDEN = 255
+
+
+def family_key(emoji) -> str:
+    """
+    Return `emoji` without skin tone and, if of a single person, gender,
+    e.g. "🧑‍⚕️" for "👩🏽‍⚕️". Families (👨‍👩‍👦, 👩‍👩‍👦) and couples (👩‍❤️‍👨, 👨‍❤️‍👨)
+    of different genders are different emoji, not variants.
+    """
+    key = _NOT_IN_FAMILY_KEY.sub('', emoji)
+    if len(_PERSONS.findall(key)) > 1:
+        return key
+    return key.translate(_GENDER_TO_ADULT)
+
+
+def preference(emoji_filters) -> tuple:
+    """
+    Return `(skin_tones, genders, hair_styles)` arguments of
+    `EmojiVariants.preferred()` from `config._emoji_filters`.
+    """
+    skin_tones = tuple(SKIN_TONES[name] for name, is_enabled in emoji_filters['Skin'].items()
+                       if is_enabled and name in SKIN_TONES)
+    genders = tuple(gender for gender, is_enabled in emoji_filters['Gender'].items() if is_enabled)
+    hair_styles = tuple(style for style, is_enabled in emoji_filters['Hair'].items() if is_enabled)
+    return skin_tones, genders, hair_styles
+
+
+class EmojiVariants:
+    """
+    Attributes and variant families of the rows of `emoji.EmojiTable` `emoji_data`.
+
+    Rows of a disabled skin tone, gender or hair style are never shown,
+    so toned rows only if a skin tone is enabled. Of the rest, each
+    family shows one variant per gender, i.e. each enabled gender adds
+    its variants. Of those, the variant in the first enabled skin tone
+    is preferred, or else the one without skin tone.
+    Unmarked rows of families that also have man or woman variants
+    count as "person".
+    """
+    def __init__(self, emoji_data):
+        self.emoji_data = emoji_data
+        self.family = array('I')  # Row -> first row of its family
+        self._members = {}  # First row -> rows, of families with more than one
+        self._keys = {}  # Family key -> first row
+        self._classes = bytearray()  # Row -> index of its bits in `_class_bits`
+        self._class_bits = []  # Distinct attribute bits
+        self._class_of = {}  # Attribute bits -> index in `_class_bits`
+        self._gendered = set()  # First rows of families with man or woman rows
+        self._ranks = (None, None)  # (preference, bytes of row ranks)
+        self.update()
+
+    def update(self):
+        """Add rows appended to `emoji_data` since the last update."""
+        emoji_data = self.emoji_data
+        gender_bits = BITS[MAN] | BITS[WOMAN]
+        newly_gendered = set()
+        for row in range(len(self.family), len(emoji_data)):
+            emoji = emoji_data.field(row, 0)
+            first = self._keys.setdefault(family_key(emoji), row)
+            self.family.append(first)
+            if first != row:
+                self._members.setdefault(first, [first]).append(row)
+            bits = 0
+            for char in emoji:
+                bits |= _CHAR_BITS.get(char, 0)
+            for sign in _GENDER_SIGN.findall(emoji):
+                bits |= _SIGN_BITS[sign]
+            if match := _NAME_GENDER.match(emoji_data.field(row, 1)):
+                bits |= BITS[match.group()]
+            if bits & gender_bits and first not in self._gendered:
+                self._gendered.add(first)
+                newly_gendered.add(first)
+            self._classes.append(self._class(bits))
+        # Their unmarked rows are "person", also those already added
+        for first in newly_gendered:
+            for row in self.members(first):
+                bits = self.bits(row)
+                if not bits & (gender_bits | BITS[PERSON]):
+                    self._classes[row] = self._class(bits | BITS[PERSON])
+        self._ranks = (None, None)
+
+    def _class(self, bits) -> int:
+        cls = self._class_of.get(bits)
+        if cls is None:
+            cls = self._class_of[bits] = len(self._class_bits)
+            assert cls < HIDDEN, 'Too many distinct emoji attributes'
+            self._class_bits.append(bits)
+        return cls
+
+    def bits(self, row) -> int:
+        """Return attribute `BITS` of `row`."""
+        return self._class_bits[self._classes[row]]
+
+    def members(self, row) -> list:
+        """Return all rows of the family of `row`, in order."""
+        first = self.family[row]
+        return self._members.get(first, [first])
+
+    def slot(self, row) -> tuple:
+        """Return `(first row of family, gender bits)` of `row`. Views show one row per slot."""
+        return self.family[row], self._class_bits[self._classes[row]] & GENDER_MASK
+
+    def _row_ranks(self, skin_tones, genders, hair_styles) -> bytes:
+        pref, ranks = self._ranks
+        if pref != (skin_tones, genders, hair_styles):
+            hidden = sum(BITS[name] for name in [*SKIN_TONES, *HAIR_STYLES, PERSON, MAN, WOMAN]
+                         if (SKIN_TONES.get(name) not in skin_tones and
+                             name not in genders and name not in hair_styles))
+            tone_bits = next((BITS[name] for name, char in SKIN_TONES.items() if char in skin_tones[:1]), 0)
+            table = bytearray([HIDDEN]) * 256
+            for cls, bits in enumerate(self._class_bits):
+                if bits & hidden:
+                    continue
+                tones = bits & SKIN_TONE_MASK
+                table[cls] = 0 if tones == tone_bits else 1 if not tones else 2
+            ranks = self._classes.translate(table)
+            self._ranks = ((skin_tones, genders, hair_styles), ranks)
+        return ranks
+
+    def preferred(self, rows, skin_tones=(), genders=(PERSON,), hair_styles=tuple(HAIR_STYLES)) -> list:
+        """
+        Return the preferred variant row of each family and gender among `rows`,
+        in order of their first rows among `rows`.
+        See `preference()` for the arguments.
+        """
+        ranks = self._row_ranks(skin_tones, genders, hair_styles)
+        slot = self.slot
+        best = {}  # Slot -> (rank, row)
+        for row in rows:
+            rank = ranks[row]
+            if rank == HIDDEN:
+                continue
+            key = slot(row)
+            current = best.get(key)
+            if current is None or rank < current[0]:
+                best[key] = (rank, row)
+        return [row for _, row in best.values()]
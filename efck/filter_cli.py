@@ -0,0 +1,146 @@
+"""
+Headless text transformation with the filters, for scripts and pipelines:
+
+    $ echo 'Hello world' | efck-chat-keyboard filter bold+underline
+    $ efck-chat-keyboard filter --jobs 4 zalgo < big.txt > bigger.txt
+
+Input is transformed line by line, read and written in blocks of
+`BLOCK_LINES` lines, so memory stays bounded by the block size
+(and the longest line). With `--jobs`, blocks are transformed in
+parallel by a process pool, in order.
+This module mustn't import Qt.
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+from collections import deque
+from itertools import islice
+
+from . import APP_NAME
+from .filter_modules import CHAIN_SEPARATOR, chain_func, load_modules, module_basename
+from .util import app_config_dirs
+
+logger = logging.getLogger(__name__)
+
+#: Number of lines read, transformed and written at once
+BLOCK_LINES = 1000
+
+_transform = None  # Filter chain of a pool worker process
+
+
+def filter_chain(names, config_dirs=None):
+    """Return function that applies filters `names` in order. Raise KeyError on unknown names."""
+    modules = {module_basename(module): module for module in load_modules(config_dirs)}
+    return chain_func([modules[name] for name in names])
+
+
+def transform_block(lines, transform) -> str:
+    """Return `lines` transformed by `transform` one by one, keeping their line endings."""
+    out = []
+    for line in lines:
+        text = line.rstrip('\r\n')
+        out.append(transform(text) + line[len(text):])
+    return ''.join(out)
+
+
+def _init_worker(names, config_dirs):
+    global _transform
+    _transform = filter_chain(names, config_dirs)
+
+
+def _transform_block(lines):
+    return transform_block(lines, _transform)
+
+
+def _iter_blocks(files):
+    for file in files:
+        while True:
+            lines = list(islice(file, BLOCK_LINES))
+            if not lines:
+                break
+            yield lines
+
+
+def transform_files(files, out, names, config_dirs=None, jobs=1):
+    """Write into `out` lines of text `files` transformed by filters `names`."""
+    if jobs <= 1:
+        transform = filter_chain(names, config_dirs)
+        for lines in _iter_blocks(files):
+            out.write(transform_block(lines, transform))
+        return
+
+    # Frozen builds rely on `multiprocessing.freeze_support()` in the entry point
+    # (see `efck.__main__`) so that pool workers don't relaunch the app
+    from multiprocessing import Pool
+
+    with Pool(jobs, _init_worker, (names, config_dirs)) as pool:
+        # Bounded number of blocks in flight, written in order
+        pending = deque()
+        for lines in _iter_blocks(files):
+            if len(pending) >= 2 * jobs:
+                out.write(pending.popleft().get())
+            pending.append(pool.apply_async(_transform_block, (lines,)))
+        while pending:
+            out.write(pending.popleft().get())
+
+
+def _open(path):
+    if path == '-':
+        return open(sys.stdin.fileno(), encoding='utf-8', errors='surrogateescape', newline='', closefd=False)
+    return open(path, encoding='utf-8', errors='surrogateescape', newline='')
+
+
+def main(argv=None, prog=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description='Transform lines of text with the (fancy Unicode) filters, '
+                    'as in the Filters tab, but without the GUI.')
+    parser.add_argument('filters', nargs='?', metavar=f'FILTER[{CHAIN_SEPARATOR}FILTER...]',
+                        help=f'Filter chain, as in the Filters tab, e.g. "bold{CHAIN_SEPARATOR}underline", '
+                             'applied in order (or comma-separated filters)')
+    parser.add_argument('files', nargs='*', metavar='FILE', default=['-'],
+                        help='Input text files (default: stdin)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of processes transforming in parallel (0: one per CPU)')
+    parser.add_argument('-l', '--list', action='store_true', help='List available filters and exit')
+    parser.add_argument('--debug', action='store_const', dest='log_level', const=logging.DEBUG,
+                        default=logging.WARNING, help='Print debug messages to stderr')
+    args = parser.parse_args(argv)
+    logging.basicConfig(format='{levelname:8s}\t{name:15s}\t{message}', style='{', level=args.log_level)
+
+    config_dirs = app_config_dirs()
+    if args.list:
+        for module in load_modules(config_dirs):
+            print(module_basename(module))
+        return 0
+    if not args.filters:
+        parser.error('the following arguments are required: FILTER')
+    names = re.split(rf'[{re.escape(CHAIN_SEPARATOR)},]', args.filters)
+    available = {module_basename(module) for module in load_modules(config_dirs)}
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        parser.error(f'unknown filter(s): {", ".join(unknown)} (available: {", ".join(sorted(available))})')
+
+    out = open(sys.stdout.fileno(), 'w', encoding='utf-8', errors='surrogateescape', newline='', closefd=False)
+    try:
+        with out:
+            files = [_open(path) for path in args.files]
+            try:
+                transform_files(files, out, names, config_dirs, jobs=args.jobs or os.cpu_count())
+            finally:
+                for file in files:
+                    file.close()
+    except BrokenPipeError:
+        # Output closed early, e.g. by `| head`
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except OSError as e:
+        print(f'{parser.prog}: error: {e}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(prog=f'{APP_NAME} filter'))
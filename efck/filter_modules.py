@@ -0,0 +1,108 @@
+"""
+Loading of filter modules (see `filters/README.md`).
+This module mustn't import Qt, since the headless `filter_cli` uses it.
+"""
+import importlib.util
+import logging
+from pathlib import Path
+
+from .filter_spec import compile_chain, compile_module, has_spec
+from .util import exec_module_from_spec, iter_config_dirs, iter_modules_from_dir
+
+logger = logging.getLogger(__name__)
+
+FILTERS_DIR = 'filters'
+#: Joins filter names into the name of their chain, e.g. "bold+underline"
+CHAIN_SEPARATOR = '+'
+
+
+def load_modules(config_dirs=None):
+    """
+    Return built-in filter modules, shadowed by name by user's config-local
+    filter modules (in `config_dirs`, default: `CONFIG_DIRS`).
+    """
+    all_modules = {}
+
+    for dir in iter_config_dirs(FILTERS_DIR, config_dirs):
+        for module in iter_modules_from_dir(dir, 'efck.filters.'):
+            all_modules[module_basename(module)] = module
+
+    # Compile declarative filters, i.e. with a mapping instead of func
+    for name, mod in all_modules.items():
+        if not hasattr(mod, 'func') and has_spec(mod):
+            try:
+                mod.func = compile_module(mod)
+            except (TypeError, ValueError) as e:
+                logger.warning('Invalid filter spec of "%s" from "%s": %s', name, mod.__spec__.origin, e)
+
+    # Empty user's config-local filters by the same name can shadow out builtins
+    for name, mod in tuple(all_modules.items()):
+        if not callable(getattr(mod, 'func', None)):
+            logger.warning('Skipping invalid module "%s" from "%s"', name, mod.__spec__.origin)
+            all_modules.pop(name)
+
+    modules = list(dict(sorted(all_modules.items())).values())
+    return modules
+
+
+def load_module_file(path):
+    """Return filter module loaded from file `path`, compiled like by `load_modules()`."""
+    spec = importlib.util.spec_from_file_location(f'efck.filters.{Path(path).stem}', path)
+    module = exec_module_from_spec(spec)
+    if not hasattr(module, 'func') and has_spec(module):
+        module.func = compile_module(module)
+    return module
+
+
+def module_basename(module):
+    name = module.__name__.rsplit('.', maxsplit=1)[1]
+    return name
+
+
+def is_builtin(module) -> bool:
+    """Return True if filter `module` ships with the app (or, if a `FilterChain`, all its filters do)."""
+    if isinstance(module, FilterChain):
+        return all(map(is_builtin, module.modules))
+    return Path(module.__spec__.origin).parent == Path(__file__).parent / FILTERS_DIR
+
+
+def chain_func(modules):
+    """
+    Return function that applies filter `modules` in order, in a single
+    pass if they are all declarative (see `filter_spec.compile_chain()`).
+    """
+    specs = [getattr(module.func, 'spec', None) for module in modules]
+    fused = None if None in specs else compile_chain(specs)
+    if fused is not None:
+        return fused
+    funcs = [module.func for module in modules]
+
+    def func(text):
+        for f in funcs:
+            text = f(text)
+        return text
+
+    return func
+
+
+class FilterChain:
+    """Filter of filter `modules` applied in order. Quacks like a filter module."""
+    def __init__(self, modules):
+        self.modules = modules
+        self.__name__ = f'efck.filters.{CHAIN_SEPARATOR.join(map(module_basename, modules))}'
+        self.func = chain_func(modules)
+
+
+def load_chains(names, modules) -> list:
+    """
+    Return `FilterChain`s of filter `modules` (e.g. from `load_modules()`) named
+    by `names`, e.g. `['bold+underline']`, skipping those of unknown filters.
+    """
+    modules = {module_basename(module): module for module in modules}
+    chains = []
+    for name in names:
+        try:
+            chains.append(FilterChain([modules[part] for part in name.split(CHAIN_SEPARATOR)]))
+        except KeyError as e:
+            logger.warning('Skipping filter chain "%s" of unknown filter %s', name, e)
+    return chains
@@ -0,0 +1,246 @@
+"""
+Isolated, time-bounded execution of user's filters.
+
+User's filter modules (from the config dirs) are arbitrary code, so
+their `func` runs in a few warm worker processes instead of the GUI
+process. Each call has a deadline; a worker that misses it, or whose
+call is canceled (e.g. because the query changed), is killed and
+replaced. A filter that misses its deadline `MAX_STRIKES` times in
+a row is disabled for the rest of the session.
+Built-in and declarative filters (see `filter_spec`) don't need this,
+and keep running in-process.
+This module mustn't import Qt, since the workers import it.
+"""
+import logging
+import multiprocessing
+import threading
+import time
+from collections import Counter, deque
+from multiprocessing.connection import wait
+
+logger = logging.getLogger(__name__)
+
+SLOW = 'slow'
+DISABLED = 'disabled'
+
+
+class FilterError(Exception):
+    """A sandboxed filter raised an error, or its worker process died."""
+
+
+class FilterDisabled(FilterError):
+    """A sandboxed filter was disabled for being too slow, repeatedly."""
+
+
+def needs_sandbox(module) -> bool:
+    """Return True if filter `module` (or `FilterChain`) runs user's code."""
+    from .filter_modules import FilterChain, is_builtin
+
+    modules = module.modules if isinstance(module, FilterChain) else [module]
+    return any(not is_builtin(module) and not hasattr(module.func, 'spec') for module in modules)
+
+
+def module_origins(module) -> tuple:
+    """Return paths of the filter module(s) of `module` (or `FilterChain`), identifying it in the sandbox."""
+    from .filter_modules import FilterChain
+
+    modules = module.modules if isinstance(module, FilterChain) else [module]
+    return tuple(module.__spec__.origin for module in modules)
+
+
+def _worker_main(conn):
+    from .filter_modules import chain_func, load_module_file
+
+    modules = {}  # Origin -> module
+    funcs = {}  # Origins -> func
+    conn.send(('ready', None))
+    while True:
+        try:
+            origins, text = conn.recv()
+        except EOFError:
+            return
+        try:
+            func = funcs.get(origins)
+            if func is None:
+                for origin in origins:
+                    if origin not in modules:
+                        modules[origin] = load_module_file(origin)
+                func = funcs[origins] = chain_func([modules[origin] for origin in origins])
+            conn.send(('ok', func(text)))
+        except Exception as e:
+            conn.send(('error', f'{e.__class__.__name__}: {e}'))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True,
+                                       name='efck-filter-sandbox')
+        self.process.start()
+        child_conn.close()
+        self.is_ready = False
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+
+class FilterSandbox:
+    """Pool of `n_workers` warm worker processes running filters with a deadline of `timeout` seconds."""
+    #: Consecutive missed deadlines after which a filter is disabled
+    MAX_STRIKES = 3
+    #: Seconds between checks for missed deadlines and cancellation
+    POLL_INTERVAL = .02
+
+    def __init__(self, n_workers=2, timeout=1.):
+        self.timeout = timeout
+        # Forking the GUI process (with its threads) isn't safe
+        self._context = multiprocessing.get_context('spawn')
+        self._workers = [_Worker(self._context) for _ in range(n_workers)]
+        self._strikes = {}  # Origins -> consecutive missed deadlines
+        self._generation = 0  # Incremented on cancel
+        self._lock = threading.Lock()  # Held by the running `map()`
+        # Calls of the current generation, so that `call()` can wait for
+        # a running `map()` instead of its lock
+        self._cond = threading.Condition()
+        self._pending = Counter()  # (origins, text) -> number of calls queued
+        self._results = {}  # (origins, text) -> result
+
+    def status(self, origins):
+        """Return `SLOW` or `DISABLED` if filter `origins` missed its last deadline(s), else None."""
+        strikes = self._strikes.get(origins, 0)
+        return DISABLED if strikes >= self.MAX_STRIKES else SLOW if strikes else None
+
+    def cancel(self):
+        """Stop iterations of `map()` called before, killing their running calls."""
+        with self._cond:
+            self._generation += 1
+            self._pending.clear()
+            self._results.clear()
+            self._cond.notify_all()
+
+    def map(self, calls):
+        """
+        Return iterator of `(key, result)` for `calls` of `(key, origins, text)`,
+        as they complete, where `result` is the output of filter `origins` (see
+        `module_origins()`) for `text`, or the exception of the failed call, i.e.
+        `TimeoutError`, `FilterDisabled` or `FilterError`.
+        Iterations of concurrent calls run one after another.
+        """
+        calls = deque(calls)
+        with self._cond:
+            self._pending.update((origins, text) for _, origins, text in calls)
+            return self._map(calls, self._generation)
+
+    def call(self, origins, text) -> str:
+        """
+        Return output of filter `origins` for `text`, or raise an exception like in `map()`.
+        If a running `map()` has the same call, wait up to `timeout` for its result.
+        Otherwise, or if the wait expires, cancel the running `map()` rather than
+        wait for the rest of it, and run the call.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: (origins, text) in self._results or not self._pending[origins, text],
+                                self.timeout)
+            result = self._results.get((origins, text))
+        if result is None:
+            self.cancel()
+            for _, result in self._map(deque([(None, origins, text)]), self._generation, shared=False):
+                break
+            else:
+                raise FilterError('Canceled')
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _restart(self, worker):
+        worker.kill()
+        self._workers[self._workers.index(worker)] = _Worker(self._context)
+
+    def _resolve(self, generation, origins, text, result):
+        with self._cond:
+            if generation == self._generation:
+                self._pending[origins, text] -= 1
+                self._results[origins, text] = result
+                self._cond.notify_all()
+
+    def _map(self, calls, generation, shared=True):
+        # Unless `shared`, `call()` can't wait for these calls
+        left = Counter((origins, text) for _, origins, text in calls) if shared else Counter()
+        try:
+            with self._lock:
+                for key, origins, text, result in self._map_locked(calls, generation):
+                    if shared:
+                        left[origins, text] -= 1
+                        self._resolve(generation, origins, text, result)
+                    yield key, result
+        finally:
+            # Calls left over after cancel, or if the iteration was abandoned
+            with self._cond:
+                if generation == self._generation:
+                    self._pending -= left
+                    self._cond.notify_all()
+
+    def _map_locked(self, calls, generation):
+        busy = {}  # Worker -> (key, origins, text, deadline)
+        while calls or busy:
+            if generation != self._generation:
+                for worker in busy:
+                    self._restart(worker)
+                return
+            for worker in self._workers:
+                while calls and worker.is_ready and worker not in busy:
+                    key, origins, text = calls.popleft()
+                    if self.status(origins) == DISABLED:
+                        yield key, origins, text, FilterDisabled()
+                        continue
+                    worker.conn.send((origins, text))
+                    busy[worker] = (key, origins, text, time.monotonic() + self.timeout)
+            if not calls and not busy:
+                return  # The rest were disabled
+            if not self._workers:
+                while calls:
+                    key, origins, text = calls.popleft()
+                    yield key, origins, text, FilterError('No filter worker process')
+                return
+            ready = wait([worker.conn for worker in self._workers], self.POLL_INTERVAL)
+            now = time.monotonic()
+            for worker in list(self._workers):
+                if worker.conn in ready:
+                    try:
+                        status, value = worker.conn.recv()
+                    except (EOFError, OSError):
+                        status, value = 'error', 'Filter process died'
+                        if worker.is_ready:
+                            self._restart(worker)
+                        else:
+                            # Failed to start; don't respawn it in a loop
+                            logger.error('Filter worker process failed to start')
+                            worker.kill()
+                            self._workers.remove(worker)
+                    if status == 'ready':
+                        worker.is_ready = True
+                        continue
+                    if worker not in busy:
+                        continue
+                    key, origins, text, _ = busy.pop(worker)
+                    if status == 'ok':
+                        self._strikes.pop(origins, None)
+                        yield key, origins, text, value
+                    else:
+                        yield key, origins, text, FilterError(value)
+                elif worker in busy and now > busy[worker][3]:
+                    key, origins, text, _ = busy.pop(worker)
+                    logger.warning('Filter "%s" took longer than %gs', ','.join(origins), self.timeout)
+                    self._restart(worker)
+                    self._strikes[origins] = self._strikes.get(origins, 0) + 1
+                    yield key, origins, text, TimeoutError()
+
+    def close(self):
+        """Cancel running calls and kill the worker processes. Later calls fail."""
+        self.cancel()
+        with self._lock:  # Wait for the canceled `map()` to let go of the workers
+            for worker in self._workers:
+                worker.kill()
+            self._workers = []
@@ -1,5 +1,2 @@
 example = 'This is deleted'
-
-
-def func(text):
-    return ''.join(ch + '̶' for ch in text)
+suffix = '\N{COMBINING LONG STROKE OVERLAY}'
@@ -1,5 +1,2 @@
 example = 'Very important!'
-
-
-def func(text):
-    return ''.join(ch + '̲' for ch in text)
+suffix = '\N{COMBINING LOW LINE}'
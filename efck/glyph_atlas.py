@@ -0,0 +1,204 @@
+"""
+Glyph atlas of pre-rasterized emoji.
+
+Color emoji fonts are slow to shape and rasterize. Therefore, each
+emoji string is rasterized only once per font, size and device pixel
+ratio into a cell of a packed sprite-sheet image. Painting then only
+blits a rect of the sheet. The sheets persist as PNG files in the cache
+dir, so later runs (and zoom levels seen before) paint without any
+font shaping at all. Only the `MAX_CACHED` most recently used atlases
+are kept.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import weakref
+
+from .qt import *
+from .util import cache_dir
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 2
+#: Number of atlases (e.g. of different zoom levels) kept in the cache dir
+MAX_CACHED = 8
+
+_atlases = weakref.WeakSet()
+
+
+@atexit.register
+def _save_atlases():
+    for atlas in list(_atlases):
+        atlas.save()
+
+
+def _atlases_dir():
+    return cache_dir() / 'glyph-atlas'
+
+
+def _resolved_font(font: QFont) -> list:
+    """
+    Return family and style of the font file that `font` resolves to,
+    and a digest of the file's `head` table, which holds the file's
+    checksum and modification time.
+    """
+    info = QFontInfo(font)
+    raw_font = QRawFont.fromFont(font)
+    head = bytes(raw_font.fontTable('head')) if raw_font.isValid() else b''
+    return [info.family(), info.styleName(), hashlib.sha1(head).hexdigest()]
+
+
+def _prune(keep=MAX_CACHED):
+    """Remove all but the `keep` most recently used atlases from the cache dir"""
+    def last_used(dir):
+        try:
+            return (dir / 'index.json').stat().st_mtime
+        except OSError:
+            return 0
+
+    try:
+        dirs = sorted(_atlases_dir().iterdir(), key=last_used, reverse=True)
+    except OSError:
+        return
+    for dir in dirs[keep:]:
+        logger.info('Removing glyph atlas "%s"', dir)
+        shutil.rmtree(dir, ignore_errors=True)
+
+
+class GlyphAtlas:
+    #: Width and height of one sprite sheet in device pixels
+    SHEET_SIZE = 1024
+
+    def __init__(self, font: QFont, cell_size: QSize, dpr: float, color, persistent=True):
+        """
+        Atlas of strings drawn in `font` and `color`, horizontally centered
+        in cells of `cell_size` logical pixels, at device pixel ratio `dpr`.
+        If not `persistent`, e.g. while fonts are still being registered,
+        the atlas is neither loaded from nor saved into the cache dir.
+        """
+        self.font = QFont(font)
+        self.color = color
+        self.cell_size = QSize(cell_size)
+        self.dpr = dpr
+        self.persistent = persistent
+        self._cell_w = math.ceil(cell_size.width() * dpr)
+        self._cell_h = math.ceil(cell_size.height() * dpr)
+        self._columns = self.SHEET_SIZE // self._cell_w
+        self._per_sheet = self._columns * (self.SHEET_SIZE // self._cell_h)
+        assert self._per_sheet, cell_size
+
+        self._slots: dict[str, int] = {}  # Text -> index of its cell across sheets
+        self._sheets: list = []  # QImage, or None if not yet loaded from disk
+        self._dirty_sheets = set()
+
+        self.key = [CACHE_VERSION, QT_VERSION_STR, self.SHEET_SIZE, self.font.families(),
+                    _resolved_font(self.font), self.font.pixelSize(),
+                    cell_size.width(), cell_size.height(), dpr, color.name()]
+        key_hash = hashlib.sha1(json.dumps(self.key).encode()).hexdigest()[:16]
+        self.dir = _atlases_dir() / key_hash
+        if persistent:
+            self._load_index()
+        _atlases.add(self)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def draw(self, painter: QPainter, top_left: QPoint, text: str):
+        slot = self._slots.get(text)
+        sheet = None if slot is None else self._sheet(slot // self._per_sheet)
+        if sheet is None:
+            slot = self._rasterize(text)
+            sheet = self._sheets[slot // self._per_sheet]
+        i = slot % self._per_sheet
+        source = QRect(i % self._columns * self._cell_w, i // self._columns * self._cell_h,
+                       self._cell_w, self._cell_h)
+        painter.drawImage(QRect(top_left, self.cell_size), sheet, source)
+
+    def _rasterize(self, text) -> int:
+        slot = len(self._slots)
+        sheet_idx, i = divmod(slot, self._per_sheet)
+        if sheet_idx == len(self._sheets):
+            sheet = QImage(self.SHEET_SIZE, self.SHEET_SIZE, QImage.Format.Format_ARGB32_Premultiplied)
+            sheet.fill(Qt.GlobalColor.transparent)
+            self._sheets.append(sheet)
+        sheet = self._sheet(sheet_idx)
+        if sheet is None:  # Atlas was reset
+            return self._rasterize(text)
+
+        static_text = QStaticText(text)
+        static_text.setTextFormat(Qt.TextFormat.PlainText)
+        static_text.setTextWidth(self.cell_size.width())
+        static_text.setTextOption(QTextOption(Qt.AlignmentFlag.AlignHCenter))
+        painter = QPainter(sheet)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.translate(i % self._columns * self._cell_w, i // self._columns * self._cell_h)
+        painter.scale(self.dpr, self.dpr)
+        painter.setClipRect(QRect(QPoint(0, 0), self.cell_size))
+        painter.setFont(self.font)
+        painter.setPen(self.color)
+        painter.drawStaticText(QPoint(0, 0), static_text)
+        painter.end()
+
+        self._slots[text] = slot
+        self._dirty_sheets.add(sheet_idx)
+        return slot
+
+    def _sheet(self, idx):
+        """Return sheet `idx`, or None if it failed to load and the atlas was reset"""
+        sheet = self._sheets[idx]
+        if sheet is None:
+            file = self.dir / f'{idx}.png'
+            sheet = QImage(str(file))
+            if sheet.isNull():
+                logger.warning('Error loading glyph atlas sheet "%s". Resetting atlas.', file)
+                self._slots.clear()
+                self._sheets.clear()
+                self._dirty_sheets.clear()
+                return None
+            sheet = sheet.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+            self._sheets[idx] = sheet
+        return sheet
+
+    def _load_index(self):
+        try:
+            with open(self.dir / 'index.json', encoding='utf-8') as fd:
+                obj = json.load(fd)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning('Error loading glyph atlas "%s": %s', self.dir, e)
+            return
+        if obj.get('key') != self.key:
+            return
+        self._slots = obj['slots']
+        self._sheets = [None] * math.ceil(len(self._slots) / self._per_sheet)
+        try:
+            os.utime(self.dir / 'index.json')  # Mark as recently used for `_prune()`
+        except OSError:
+            pass
+        logger.info('Loaded glyph atlas of %d glyphs from "%s"', len(self._slots), self.dir)
+
+    def save(self):
+        """Write modified sheets and the index into the cache dir"""
+        if not self._dirty_sheets or not self.persistent:
+            return
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            for idx in sorted(self._dirty_sheets):
+                if not self._sheets[idx].save(str(self.dir / f'{idx}.png')):
+                    raise OSError(f'Cannot write sheet {idx}')
+            tmp_file = self.dir / f'index.json.{os.getpid()}.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as fd:
+                json.dump({'key': self.key, 'slots': self._slots}, fd)
+            os.replace(tmp_file, self.dir / 'index.json')
+        except OSError as e:
+            logger.warning('Error saving glyph atlas "%s": %s', self.dir, e)
+            return
+        self._dirty_sheets.clear()
+        logger.info('Saved glyph atlas of %d glyphs into "%s"', len(self._slots), self.dir)
+        _prune()
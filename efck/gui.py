@@ -1,9 +1,13 @@
 import atexit
 import logging
+import queue
+import threading
 from pathlib import Path
 
 from . import IS_MACOS
+from .profiling import phase
 from .qt import *
+from .usage import usage_store
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +27,63 @@ def fire_after(self, timer_attr, callback, interval_ms):
         timer.start()
 
 
+class ThreadDelivery(QTimer):
+    """Timer delivering the items of `run_in_thread()` into the GUI thread."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.canceled = threading.Event()
+
+    def cancel(self):
+        """Stop the background thread (after its current item) and the delivery."""
+        self.canceled.set()
+        self.stop()
+        self.deleteLater()
+
+
+def run_in_thread(parent, iterable, on_item, on_finished=None, poll_interval_ms=15) -> ThreadDelivery:
+    """
+    Iterate `iterable` in a background thread and call `on_item(item)`
+    for each of its items, and finally `on_finished()`, in the GUI thread.
+    Returns a `ThreadDelivery` timer; `cancel()` it to stop both the
+    iteration and the delivery.
+    """
+    items = queue.SimpleQueue()
+    finished = object()
+
+    def iterate():
+        try:
+            iterator = iter(iterable)
+            while not timer.canceled.is_set():
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                items.put(item)
+        except Exception:
+            logger.exception('Error in background thread')
+        finally:
+            items.put(finished)
+
+    def deliver():
+        while not timer.canceled.is_set():
+            try:
+                item = items.get_nowait()
+            except queue.Empty:
+                return
+            if item is finished:
+                timer.stop()
+                timer.deleteLater()
+                if on_finished:
+                    on_finished()
+                return
+            on_item(item)
+
+    timer = ThreadDelivery(parent, interval=poll_interval_ms, timeout=deliver)
+    timer.start()
+    threading.Thread(target=iterate, daemon=True).start()
+    return timer
+
+
 class _HasSizeGripMixin:
     SIZEGRIP_SIZE = 16
 
@@ -68,7 +129,7 @@ class _AutoQuitOnFocusLostMixin:
         self.quit_timer = QTimer(
             self, interval=1500, singleShot=True,
             timeout=lambda: (
-                QApplication.quit()
+                self.quit_or_hide()
                 if len(self.current_tab.line_edit.text()) < 10 else
                 None))
         QApplication.instance().applicationStateChanged.connect(self.on_app_state_changed)
@@ -84,6 +145,10 @@ class MainWindow(_HasSizeGripMixin,
                  _WindowMovableMixin,
                  _AutoQuitOnFocusLostMixin,
                  QTabWidget):
+    #: In daemon (resident) mode, the window is hidden instead of
+    #: quitting the app, and it is re-shown via `reshow()`
+    is_daemon = False
+
     def __init__(self):
         # GUI programming is realy messy, right?
 
@@ -91,21 +156,9 @@ class MainWindow(_HasSizeGripMixin,
 
         # Init the main app/tabbed widget
 
-        def _initial_window_geometry():
-            mouse_pos = QCursor.pos()
-            geometry = config_state['window_geometry']
-            logger.debug('Window geometry: %s', geometry)
-            valid_geom = QGuiApplication.primaryScreen().availableGeometry()
-            PAD_PX = 50
-            top_left = [max(mouse_pos.x() - geometry[0], valid_geom.x() + PAD_PX),
-                        max(mouse_pos.y() - geometry[1], valid_geom.y() + PAD_PX)]
-            geometry = [min(geometry[0], valid_geom.width() - 2 * PAD_PX),
-                        min(geometry[1], valid_geom.height() - 2 * PAD_PX)]
-            return top_left + geometry
-
         super().__init__(
             windowTitle=QApplication.instance().applicationName(),
-            geometry=QRect(*_initial_window_geometry()),
+            geometry=self._geometry_at_cursor(),
             windowIcon=QIcon(str(ICON_DIR / 'logo.png')),
             documentMode=True,
             usesScrollButtons=True,
@@ -157,13 +210,13 @@ class MainWindow(_HasSizeGripMixin,
             toolTip='Close',
             parent=self,
         )
-        close_button.clicked.connect(QApplication.instance().quit)
+        close_button.clicked.connect(self.quit_or_hide)
         self.setCornerWidget(close_button, Qt.Corner.TopRightCorner)
 
         # Populate tabs
 
         from .tab import Tab
-        from . import tabs; tabs  # This makes all the Tabs available via Tab.__subclasses__  # noqa: E702
+        from . import tabs
         from .tabs._options import OptionsTab
 
         def _on_text_edited():
@@ -176,6 +229,7 @@ class MainWindow(_HasSizeGripMixin,
                 tab.delegate.set_text(text)
             tab._reset_view_select_top_item()
 
+        self._on_text_edited = _on_text_edited
         text_changed_timer = QTimer(
             parent=self,
             singleShot=True,
@@ -189,19 +243,20 @@ class MainWindow(_HasSizeGripMixin,
 
         qt_set_sequence_auto_mnemonic(True)  # Enable tab mnemonics (or at least shortcuts) on macOS
 
+        # Tabs are constructed on first selection (see `current_tab`).
+        # Until then, the tab bar shows their manifests' labels and icons.
         self.tabs: list[Tab] = []
-        tab_classes = {i.__name__: i for i in Tab.__subclasses__()}.values()  # Avoid dupes due to imports
-        tab_classes = sorted(tab_classes, key=lambda x: x.__name__)
-        logger.info('Found tabs: %s', tab_classes)
-        for tab_class in tab_classes:
-            tab = tab_class(
-                parent=self,
-                options_tab=options_tab,
-                textEdited=text_changed_timer.start,
-                activated=self.on_activated,
-            )
-            self.addTab(tab, tab.icon, tab.label)
-            self.tabs.append(tab)
+        self._tab_kwargs = dict(
+            options_tab=options_tab,
+            textEdited=text_changed_timer.start,
+            activated=self.on_activated,
+        )
+        manifests = tabs.tab_manifests()
+        logger.info('Found tabs: %s', [manifest['class'] for manifest in manifests])
+        for manifest in manifests:
+            placeholder = _UnloadedTab(manifest, parent=self)
+            self.addTab(placeholder, tabs.tab_icon(manifest), manifest['label'])
+            self.tabs.append(placeholder)
         assert self.tabs, 'No tab classes found. Are efck.tabs.* modules present?'
 
         self.addTab(
@@ -212,9 +267,15 @@ class MainWindow(_HasSizeGripMixin,
             '&Options')
 
         OPTIONS_TAB_IDX = len(self.tabs)
-        prev_idx = 0
+        self.setCurrentIndex(config_state['selected_tab'])
+        prev_idx = self.currentIndex()
         prev_text = ''
 
+        def _add_options_sections():
+            # Import (but don't construct) the not yet loaded tabs
+            for manifest in manifests:
+                options_tab.add_tab_section(tabs.load_tab_class(manifest['class']))
+
         def _on_tab_changed(idx):
             nonlocal prev_idx, prev_text, options_tab
             logger.debug('Curr tab %d, prev %d', idx, prev_idx)
@@ -223,26 +284,69 @@ class MainWindow(_HasSizeGripMixin,
             # Carry over line edit text
             if prev_idx != OPTIONS_TAB_IDX:
                 prev_text = self.tabs[prev_idx].line_edit.text()
-            if idx != OPTIONS_TAB_IDX:
-                tab = self.tabs[idx]
+            if idx == OPTIONS_TAB_IDX:
+                _add_options_sections()
+            else:
+                tab = self.current_tab
                 if tab.line_edit.text() != prev_text:
                     tab.line_edit.setText(prev_text)
+                    # Refilter. Recent results are cached by models.
+                    tab.line_edit.textEdited.emit(prev_text)
                 tab.line_edit.setFocus()
 
             if prev_idx == OPTIONS_TAB_IDX:
-                # Reload models
+                # Reconfigure models
                 if options_tab.save_dirty():
-                    for tab in self.tabs:
-                        tab.reset_model()
+                    for tab in self.loaded_tabs:
+                        tab.reconfigure_model()
             prev_idx = idx
 
         self.currentChanged.connect(_on_tab_changed)
 
         # End in the following state and wait for user input
 
-        self.current_tab.line_edit.setFocus()
         options_tab.findChild(QSlider).setFocus()  # On Options tab, set focus to first child
-        self.setCurrentIndex(config_state['selected_tab'])
+        if self.current_tab:
+            self.current_tab.line_edit.setFocus()
+        else:
+            _add_options_sections()
+        self.raise_()
+        self.activateWindow()
+
+    @staticmethod
+    def _geometry_at_cursor():
+        from .config import config_state
+
+        mouse_pos = QCursor.pos()
+        geometry = config_state['window_geometry']
+        logger.debug('Window geometry: %s', geometry)
+        valid_geom = QGuiApplication.primaryScreen().availableGeometry()
+        PAD_PX = 50
+        top_left = [max(mouse_pos.x() - geometry[0], valid_geom.x() + PAD_PX),
+                    max(mouse_pos.y() - geometry[1], valid_geom.y() + PAD_PX)]
+        geometry = [min(geometry[0], valid_geom.width() - 2 * PAD_PX),
+                    min(geometry[1], valid_geom.height() - 2 * PAD_PX)]
+        return QRect(*(top_left + geometry))
+
+    def quit_or_hide(self):
+        """Quit the app, or, in daemon mode, hide the window until re-shown"""
+        if not self.is_daemon:
+            QApplication.instance().quit()
+            return
+        logger.info('Hiding window')
+        self.quit_timer.stop()
+        self.hide()
+
+    def reshow(self):
+        """Re-show the hidden (daemon) window at mouse cursor with a fresh query"""
+        logger.info('Re-showing window')
+        self.setGeometry(self._geometry_at_cursor())
+        tab = self.current_tab
+        if tab:
+            tab.line_edit.clear()
+            self._on_text_edited()
+            tab.line_edit.setFocus()
+        self.show()
         self.raise_()
         self.activateWindow()
 
@@ -272,7 +376,7 @@ class MainWindow(_HasSizeGripMixin,
                      text)
         # Escape key exits the app
         if key == Qt.Key.Key_Escape or event.matches(QKeySequence.StandardKey.Cancel):
-            QApplication.instance().quit()
+            return self.quit_or_hide()
 
         tab = self.current_tab
         # Don't handle other keypresses on Options tab here
@@ -316,13 +420,38 @@ class MainWindow(_HasSizeGripMixin,
 
     @property
     def current_tab(self):
+        idx = self.currentIndex()
         try:
-            return self.tabs[self.currentIndex()]
+            tab = self.tabs[idx]
         except IndexError:
             return None  # I.e. on Options tab
+        if isinstance(tab, _UnloadedTab):
+            tab = self._load_tab(idx)
+        return tab
+
+    @property
+    def loaded_tabs(self):
+        return [tab for tab in self.tabs if not isinstance(tab, _UnloadedTab)]
+
+    def _load_tab(self, idx):
+        from .tabs import load_tab_class
+
+        placeholder = self.tabs[idx]
+        tab_class = load_tab_class(placeholder.manifest['class'])
+        with phase(f'construct {tab_class.__name__}'):
+            tab = tab_class(parent=self, **self._tab_kwargs)
+        # Swap the placeholder page quietly
+        self.blockSignals(True)
+        self.removeTab(idx)
+        self.insertTab(idx, tab, tab.icon, tab.label)
+        self.setCurrentIndex(idx)
+        self.blockSignals(False)
+        placeholder.deleteLater()
+        self.tabs[idx] = tab
+        return tab
 
     def on_activated(self):
-        """On listView activation, type out the characters and exit the app"""
+        """On listView activation, type out the characters and exit (or hide) the app"""
         tab = self.current_tab
 
         # Ensure some view item is selected
@@ -335,6 +464,7 @@ class MainWindow(_HasSizeGripMixin,
         from .config import config_state
 
         force_clipboard = config_state['force_clipboard']
+        item = tab.activated_item()
 
         if tab.activation_can_fail:
             # Tab will tell us if success (such as a DND op)
@@ -352,11 +482,22 @@ class MainWindow(_HasSizeGripMixin,
 
             tab.activated(force_clipboard=force_clipboard)
 
-        QApplication.instance().quit()
+        if item is not None:
+            usage_store().record(tab.__class__.__name__, item)
+        self.quit_or_hide()
+
+
+class _UnloadedTab(QWidget):
+    """Placeholder page of a tab that is constructed on first selection"""
+    def __init__(self, manifest, parent):
+        super().__init__(parent=parent)
+        self.manifest = manifest
 
 
 class _TabPrivate(QWidget):
     def __init__(self, parent, options_tab, textEdited, activated):
+        # `options_tab` is unused (and deprecated); it adds our `Options`
+        # section itself, when opened. Kept for subclasses that pass it on.
         from .config import config_state
 
         super().__init__(parent=parent)
@@ -399,12 +540,6 @@ class _TabPrivate(QWidget):
         view.setModel(self.model)
         view.setItemDelegate(self.delegate)
 
-        options_section: QGroupBox = self.Options(config=config_part, parent=None)
-        if options_section.children():
-            config_state[self.__class__.__name__] = config_part
-            options_section.setParent(self)
-            options_tab.add_section(self.label, options_section)
-
     def init_delegate(self, **kwargs):
         """Call this whenever options change that would influence rendering by the delegate"""
         if hasattr(self.delegate, 'init'):
@@ -422,16 +557,35 @@ class _TabPrivate(QWidget):
             from .config import config_state
 
             config_part = config_state.get(self.__class__.__name__, {})
-            self.model.beginResetModel()
-            self.model.init(config=config_part)
-            self.model.endResetModel()
+            with phase(f'reset {self.__class__.__name__} model'):
+                self.model.beginResetModel()
+                self.model.init(config=config_part)
+                self.model.endResetModel()
             self._reset_view_select_top_item()
             self.line_edit.textEdited.emit(self.line_edit.text())
 
+    def reconfigure_model(self):
+        """Apply changed options to the model, in place if it supports it, else by a reset"""
+        reconfigure = getattr(self.model, 'reconfigure', None)
+        if self._model_was_init and reconfigure is not None:
+            from .config import config_state
+
+            config_part = config_state.get(self.__class__.__name__, {})
+            with phase(f'reconfigure {self.__class__.__name__} model'):
+                is_done = reconfigure(config=config_part)
+            if is_done:
+                self._reset_view_select_top_item()
+                return
+        self.reset_model()
+
     def _reset_view_select_top_item(self):
         view: QListView = self.view
         prev_current_index = view.selectionModel().currentIndex()
-        view.reset()
+        if self.model_signals_row_changes:
+            # Item painting may depend on the new text, too
+            view.viewport().update()
+        else:
+            view.reset()
         current_index = (view.model().index(0, 0)
                          if self.line_edit_resets_selection or not prev_current_index.isValid() else
                          prev_current_index)
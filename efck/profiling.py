@@ -0,0 +1,62 @@
+"""
+Startup phase profiler.
+
+Named phases are timed always (it's cheap) with a monotonic clock,
+relative to the import of the `efck` package. Only the first
+occurrence of each phase name is kept, so repeated calls (e.g. on
+model resets after startup) don't accumulate.
+With `--profile-startup`, `write_report()` dumps them into a JSON file.
+This module mustn't import Qt since it times that, too.
+"""
+import json
+import platform
+import sys
+import time
+from contextlib import contextmanager
+
+_T0 = time.perf_counter()
+
+_phases: dict[str, tuple[float, float]] = {}  # name -> (start, end), seconds since _T0
+
+
+def now() -> float:
+    return time.perf_counter() - _T0
+
+
+def record(name, start, end=None):
+    """Record phase `name` that ran from `start` to `end` (default: now), as returned by `now()`"""
+    if name not in _phases:
+        _phases[name] = (start, now() if end is None else end)
+
+
+@contextmanager
+def phase(name):
+    start = now()
+    try:
+        yield
+    finally:
+        record(name, start)
+
+
+def report(**info) -> dict:
+    """Return the report of phases recorded so far, in order of start time"""
+    phases = sorted(_phases.items(), key=lambda item: item[1])
+    return dict(
+        info,
+        python=platform.python_version(),
+        platform=sys.platform,
+        total_ms=round(max((end for _, end in _phases.values()), default=0) * 1000, 2),
+        phases=[dict(name=name,
+                     start_ms=round(start * 1000, 2),
+                     duration_ms=round((end - start) * 1000, 2))
+                for name, (start, end) in phases],
+    )
+
+
+def write_report(path, **info):
+    """Write JSON report into `path` and a one-line summary to stderr"""
+    obj = report(**info)
+    with open(path, 'w', encoding='utf-8') as fd:
+        json.dump(obj, fd, indent=2)
+    summary = ', '.join(f'{phase["name"]} {phase["duration_ms"]:.0f}' for phase in obj['phases'])
+    print(f'Startup {obj["total_ms"]:.0f} ms: {summary} (ms). Report: {path}', file=sys.stderr)
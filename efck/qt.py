@@ -3,29 +3,71 @@ A single module containing all used classes from Qt.
 """
 import logging as _logging
 import os as _os
+import sys as _sys
 import typing as _typing
 from importlib import import_module as _import_module
+from pathlib import Path as _Path
+
+from . import APP_NAME as _APP_NAME
 
 # Specify literally for IDE typing/autocompletion
 if _typing.TYPE_CHECKING:
     try:
         from ._qt.pyqt6 import *
+        from PyQt6.QtNetwork import *
+        from PyQt6.QtTest import *
     except ImportError:
         try:
             from ._qt.pyside6 import *
+            from PySide6.QtNetwork import *
+            from PySide6.QtTest import *
         except ImportError:
             try:
                 from ._qt.pyqt5 import *
+                from PyQt5.QtNetwork import *
+                from PyQt5.QtTest import *
             except ImportError:
                 pass
 
 _logger = _logging.getLogger(__name__)
+_name, _package = __name__, __package__  # Before the binding's globals override them
+
+_APIS = ('pyqt6', 'pyside6', 'pyqt5')
 
 QT_API = _os.environ.get('QT_API', '').lower()  # QtPy uses this variable, so we can too
 if QT_API:
     _logger.info('Obeying env variable QT_API="%s"', QT_API)
 
-try_apis = (QT_API,) if QT_API else ('pyqt6', 'pyside6', 'pyqt5')
+
+def _last_api_file():
+    # Same as QStandardPaths.CacheLocation, but known before Qt is imported
+    if _sys.platform == 'win32':
+        return _Path(_os.environ.get('LOCALAPPDATA', '~'), _APP_NAME, 'cache', 'qt-api').expanduser()
+    if _sys.platform == 'darwin':
+        return _Path('~/Library/Caches', _APP_NAME, 'qt-api').expanduser()
+    return _Path(_os.environ.get('XDG_CACHE_HOME') or '~/.cache', _APP_NAME, 'qt-api').expanduser()
+
+
+def _read_last_api():
+    try:
+        api = _last_api_file().read_text().strip()
+    except OSError:
+        return None
+    return api if api in _APIS else None
+
+
+def _write_last_api(api):
+    try:
+        file = _last_api_file()
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(api)
+    except OSError as exc:
+        _logger.debug('Cannot remember Qt API: %s', exc)
+
+
+# Try the binding that worked last time first
+_last_api = None if QT_API else _read_last_api()
+try_apis = (QT_API,) if QT_API else (*filter(None, [_last_api]), *(api for api in _APIS if api != _last_api))
 for qt_api in try_apis:
     try:
         _mod = _import_module(f'.{qt_api}', __package__ + '._qt')
@@ -34,6 +76,8 @@ for qt_api in try_apis:
     else:
         globals().update(_mod.__dict__)
         QT_API = qt_api
+        if not _os.environ.get('QT_API') and qt_api != _last_api:
+            _write_last_api(qt_api)
         break
 
 try:
@@ -43,9 +87,39 @@ except NameError:
                        'Run `pip install PyQt6` or `pip install PySide6`.'
                        f'Environment variable is QT_API={QT_API}') from None
 
+# Name -> Qt submodule providing it. Rarely needed Qt submodules
+# (QtNetwork, QtTest) are only imported on first access of their names
+# as attributes of this module. Note, `from .qt import *` doesn't
+# include these names, so import them explicitly.
+_lazy_names = {name: module_name
+               for module_name, names in _LAZY_IMPORTS.items()
+               for name in names}
+
+
+def __getattr__(name):
+    module_name = _lazy_names.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    _logger.debug('Importing %s', module_name)
+    module = _import_module(module_name)
+    for name_ in _LAZY_IMPORTS[module_name]:
+        globals()[name_] = getattr(module, name_)
+    return globals()[name]
+
 
 def event_position(event):
     try:
         return event.position().toPoint()
     except AttributeError:  # PyQt5
         return event.pos()
+
+
+def font_families():
+    try:
+        return QFontDatabase.families()
+    except TypeError:  # PyQt5
+        return QFontDatabase().families()
+
+
+# Qt objects (fonts, icons ...) need a live QApplication
+_sys.modules[_package]._init_qt(_sys.modules[_name])
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from .qt import *
 from .gui import _TabPrivate
 
@@ -6,6 +8,22 @@ class Tab(_TabPrivate):
     """
     This is the tab base. You create a tab by extending this class
     and define/override below properties.
+
+    A tab module may also declare a literal, module-level manifest,
+    e.g.::
+
+        TAB_MANIFEST = {
+            'class': 'MyTab',        # Name of the Tab subclass in the module
+            'label': '&My tab',
+            'icon': 'my-icon.png',   # Path, relative to efck/icons/
+            'icon_theme': 'my-icon', # Optional QIcon.fromTheme() name
+            'order': 40,             # Position in the tab bar; default 100
+        }
+
+    Such a module is only imported, and the tab only constructed, when
+    the tab is first selected. Modules without a manifest are imported
+    at startup, and their tabs get the default order. Tabs of the same
+    order keep the order of discovery, i.e. by config dir, then file name.
     """
     #
     # Init properties
@@ -29,6 +47,11 @@ class Tab(_TabPrivate):
     #: would likely want to apply the same, selected filter.
     line_edit_resets_selection = True
 
+    #: The Model signals its own row changes on `set_text()` (e.g. with
+    #: `beginInsertRows()`), so the QListView needn't be reset afterwards,
+    #: which would lose its scroll position and current index.
+    model_signals_row_changes = False
+
     #: Use this if the QListView activation method (i.e. upon pressing
     # Enter key) can still fail or be cancelled by a user. This is
     #: used in Gifs tab where a QDrag (DND) operation can be canceled
@@ -62,6 +85,14 @@ class Tab(_TabPrivate):
             Called after a timeout tied on QLineEdit.textChanged signal.
             """
 
+        def reconfigure(self, config: dict, **kwargs) -> bool:
+            """
+            Optional. Called when program options were reconfigured.
+            Return True if the model applied `config` in place,
+            without needing a reset with `init()`.
+            """
+            return False
+
     class Delegate(QStyledItemDelegate):
         """
         Override this to customize the painting and presentation of
@@ -101,6 +132,14 @@ class Tab(_TabPrivate):
         considered canceled and the app is back in idle state.
         """
 
+    def activated_item(self) -> Optional[str]:
+        """
+        Return a string identifying the current item for the usage
+        history (see `efck.usage`), or None to not record it.
+        Called right before `activated()`.
+        """
+        return None
+
     # References to instances of above types. Can be used to refer
     # to one another in methods like `activated()`, but watch out.
     line_edit: QLineEdit  #:
@@ -1,16 +1,98 @@
+"""
+Tab discovery.
+
+Tab modules that declare a literal `TAB_MANIFEST` dict (see `Tab`)
+are not imported here. The manifest alone is enough to show the tab
+in the tab bar, and the module is imported on first `load_tab_class()`.
+Tab modules without a manifest are imported eagerly.
+Manifests are cached by their module file's mtime, so that tab
+modules aren't parsed on every startup.
+"""
+import json
 import logging
+import os
 import typing
 
+from ..qt import *
+from ..gui import ICON_DIR
+from ..profiling import phase
 from ..tab import Tab
-from ..util import iter_config_dirs, iter_modules_from_dir
+from ..util import (
+    cache_dir, exec_module_from_spec, iter_config_dirs, iter_module_specs_from_dir, read_module_literal,
+)
 
 logger = logging.getLogger(__name__)
 
+#: Order of tabs without an explicit manifest `order`
+DEFAULT_ORDER = 100
+
+MANIFEST_CACHE_FILENAME = 'tab-manifests.json'
+
 _modules = []  # Fixes missing Filters tab due to lost reference on PySide6
+_manifests = {}  # Tab class name -> manifest (+ 'spec', and, once loaded, 'tab_class'), in discovery order
+
+
+def _load_manifest_cache() -> dict:
+    try:
+        with open(cache_dir() / MANIFEST_CACHE_FILENAME, encoding='utf-8') as fd:
+            cache = json.load(fd)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _dump_manifest_cache(cache):
+    file = cache_dir() / MANIFEST_CACHE_FILENAME
+    tmp_file = file.with_name(f'{file.name}.{os.getpid()}.tmp')
+    try:
+        file.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_file, 'w', encoding='utf-8') as fd:
+            json.dump(cache, fd)
+        os.replace(tmp_file, file)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning('Failed to write tab manifest cache "%s": %s', file, e)
+        tmp_file.unlink(missing_ok=True)
+
+
+def _read_manifest(spec, cache):
+    try:
+        stat = os.stat(spec.origin)
+    except (OSError, TypeError):
+        return None
+    key = [stat.st_mtime_ns, stat.st_size]
+    cached = cache.get(spec.origin)
+    if isinstance(cached, list) and cached[:1] == [key]:
+        return cached[1]
+    manifest = read_module_literal(spec, 'TAB_MANIFEST')
+    cache[spec.origin] = [key, manifest]
+    return manifest
+
+
+def _add_tab_classes():
+    # Tabs of eagerly imported modules shadow the manifests of the same name
+    for cls in Tab.__subclasses__():
+        if _manifests.get(cls.__name__, {}).get('tab_class') is not cls:
+            _manifests[cls.__name__] = {'class': cls.__name__, 'label': cls.label, 'tab_class': cls}
 
-for dir in iter_config_dirs('tabs'):
-    for module in iter_modules_from_dir(dir, 'efck.tabs.'):
-        _modules.append(module)
+
+def _discover():
+    cache = _load_manifest_cache()
+    new_cache = {}
+    for dir in iter_config_dirs('tabs'):
+        for spec in iter_module_specs_from_dir(dir, 'efck.tabs.'):
+            if spec.origin in cache:
+                new_cache[spec.origin] = cache[spec.origin]
+            manifest = _read_manifest(spec, new_cache)
+            if manifest:
+                _manifests[manifest['class']] = dict(manifest, spec=spec)
+            else:
+                _modules.append(exec_module_from_spec(spec))
+                _add_tab_classes()
+    if new_cache != cache:
+        _dump_manifest_cache(new_cache)
+
+
+_discover()
 
 # Export tabs here.
 # Import `from .tabs` to avoid double import of the module
@@ -20,3 +102,40 @@ globals().update({cls.__name__: cls for cls in Tab.__subclasses__()})
 # And for IDE ...
 if typing.TYPE_CHECKING:
     from .emoji import EmojiTab  # noqa: F401
+
+
+def __getattr__(name):
+    # Import manifest-only tabs on access
+    if name in _manifests:
+        return load_tab_class(name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def tab_manifests() -> list[dict]:
+    """
+    Return manifests of all tabs, loaded or not, in tab bar order,
+    i.e. by manifest `order`, then in order of discovery.
+    """
+    return sorted(_manifests.values(), key=lambda manifest: manifest.get('order', DEFAULT_ORDER))
+
+
+def tab_icon(manifest) -> QIcon:
+    if 'tab_class' in manifest:
+        return manifest['tab_class'].icon
+    icon = QIcon(QPixmap(str(ICON_DIR / manifest['icon']))) if 'icon' in manifest else QIcon()
+    if 'icon_theme' in manifest:
+        icon = QIcon.fromTheme(manifest['icon_theme'], icon)
+    return icon
+
+
+def load_tab_class(name) -> type[Tab]:
+    """Return Tab class `name`, importing its module if needed."""
+    manifest = _manifests[name]
+    if 'tab_class' not in manifest:
+        spec = manifest['spec']
+        logger.info('Loading tab %s from "%s"', name, spec.origin)
+        with phase(f'import {name} module'):
+            module = exec_module_from_spec(spec)
+        _modules.append(module)
+        manifest['tab_class'] = getattr(module, name)
+    return manifest['tab_class']
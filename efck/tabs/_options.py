@@ -15,6 +15,7 @@ class OptionsTab(QWidget):
         from ..config import config_state
 
         self._initial_config = copy.deepcopy(config_state)
+        self._tab_sections = set()
 
         def zoom_changed(value):
             nonlocal ONE_TICK_IN_PCT, slider_label, change_zoom_timer
@@ -75,8 +76,24 @@ class OptionsTab(QWidget):
         box.layout().addWidget(widget)
         self.layout().addWidget(box)
 
+    def add_tab_section(self, tab_class):
+        """Add the options section of `tab_class` unless it was already added"""
+        from ..config import config_state
+
+        name = tab_class.__name__
+        if name in self._tab_sections:
+            return
+        self._tab_sections.add(name)
+        config_part = config_state.get(name, {})
+        options_section: QWidget = tab_class.Options(config=config_part, parent=None)
+        if options_section.children():
+            config_state[name] = config_part
+            self.add_section(tab_class.label, options_section)
+        else:
+            options_section.deleteLater()
+
     def save_dirty(self, exiting=False) -> bool:
-        """Returns True if config had changed and emoji need reloading"""
+        """Returns True if config had changed and models need reconfiguring"""
         from ..config import dump_config, config_state
         logger.debug('Saving config state if changed')
         if config_state != self._initial_config:
@@ -84,7 +101,7 @@ class OptionsTab(QWidget):
             self._initial_config = copy.deepcopy(config_state)
 
             if not exiting:
-                for tab in self.nativeParentWidget().tabs:
+                for tab in self.nativeParentWidget().loaded_tabs:
                     tab.init_delegate(config=config_state.get(tab.__class__.__name__),
                                       zoom=config_state.get('zoom', 100) / 100)
             return True
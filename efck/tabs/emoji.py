@@ -1,22 +1,99 @@
+import html
+import json
 import logging
 import os
 import re
-from functools import lru_cache
+from array import array
+from collections import OrderedDict
 from pathlib import Path
+from typing import Optional
 
 from .. import IS_MACOS, IS_WIDOWS
 from ..qt import *
-from ..gui import ICON_DIR
+from ..glyph_atlas import GlyphAtlas
+from ..gui import ICON_DIR, fire_after, run_in_thread
 from ..tab import Tab
-from ..emoji import enum_emojis
+from ..emoji import EmojiTable, iter_emoji_chunks, load_cached_emojis
+from ..emoji_annotations import load_annotations
+from ..emoji_fuzzy import FuzzyIndex
+from ..emoji_index import EmojiIndex, first_matching_string, refines
+from ..emoji_semantic import SemanticIndex, is_available as is_semantic_available
+from ..emoji_variants import EmojiVariants, preference
 from ..output import type_chars
+from ..profiling import now, phase, record
+from ..usage import usage_store
+from ..util import cache_dir, system_locales
 
 logger = logging.getLogger(__name__)
 
+# Read by `efck.tabs` without importing this module
+TAB_MANIFEST = {
+    'class': 'EmojiTab',
+    'label': '&Emoji',
+    'icon': 'awesome-emoji.png',
+    'order': 10,
+}
+
+
+def _runs(indexes):
+    """Group ascending `indexes` into a list of inclusive `(first, last)` runs."""
+    runs = []
+    for i in indexes:
+        if runs and runs[-1][1] == i - 1:
+            runs[-1][1] = i
+        else:
+            runs.append([i, i])
+    return runs
+
+
+def _font_cache_file():
+    return cache_dir() / 'emoji-font.json'
+
+
+def _font_dirs_mtimes() -> list:
+    """
+    Return mtimes of the font dirs, and of fontconfig's cache dirs, which
+    change when fonts are installed or removed (and fontconfig caches rebuilt).
+    """
+    dirs = QStandardPaths.standardLocations(QStandardPaths.StandardLocation.FontsLocation)
+    if not (IS_MACOS or IS_WIDOWS):
+        dirs += [str(Path(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericCacheLocation),
+                          'fontconfig')),
+                 '/var/cache/fontconfig']
+    mtimes = []
+    for dir in dirs:
+        try:
+            mtimes.append([dir, os.stat(dir).st_mtime_ns])
+        except OSError:
+            pass
+    return mtimes
+
+
+def _load_font_cache(key):
+    try:
+        with open(_font_cache_file(), encoding='utf-8') as fd:
+            obj = json.load(fd)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning('Error loading emoji font cache: %s', e)
+        return None
+    return obj if obj.get('key') == key else None
+
+
+def _dump_font_cache(key, **obj):
+    try:
+        file = _font_cache_file()
+        file.parent.mkdir(parents=True, exist_ok=True)
+        with open(file, 'w', encoding='utf-8') as fd:
+            json.dump(dict(obj, key=key), fd)
+    except OSError as e:
+        logger.warning('Error saving emoji font cache: %s', e)
+
 
 class EmojiTab(Tab):
-    label = '&Emoji'
-    icon = QIcon(QPixmap(str(ICON_DIR / 'awesome-emoji.png')))
+    label = TAB_MANIFEST['label']
+    icon = QIcon(QPixmap(str(ICON_DIR / TAB_MANIFEST['icon'])))
     line_edit_kwargs = dict(
         placeholderText='Filter emoji ...',
     )
@@ -28,68 +105,406 @@ class EmojiTab(Tab):
         # https://stackoverflow.com/questions/10464478/blinking-issue-when-using-qlistwidget-in-batched-mode/14533119
         verticalScrollBarPolicy=Qt.ScrollBarPolicy.ScrollBarAlwaysOn,
     )
-    # Left/Right keys move the list view item selection
-    line_edit_ignore_keys = {Qt.Key.Key_Left, Qt.Key.Key_Right} | Tab.line_edit_ignore_keys
+    # Left/Right keys move the list view item selection,
+    # Menu key pops up the skin tone / gender variants
+    line_edit_ignore_keys = {Qt.Key.Key_Left, Qt.Key.Key_Right, Qt.Key.Key_Menu} | Tab.line_edit_ignore_keys
+    # See `Model._update_rows()`
+    model_signals_row_changes = True
+
+    def activated_item(self):
+        return self.view.currentIndex().data()
 
     def activated(self, force_clipboard, **kwargs):
         text = self.view.currentIndex().data()
         type_chars(text, force_clipboard)
 
-    class ListModel(QAbstractListModel):
+    def pick_variant(self):
+        """Pop up the variants of the current emoji. The picked one is activated."""
+        index = self.view.currentIndex()
+        if not index.isValid():
+            return
+        rows = self.model.variant_rows(index)
+        if len(rows) < 2:
+            return
+        picker = EmojiTab.VariantPicker(self, rows)
+
+        def on_picked(item):
+            self.model.set_variant(index, rows[picker.row(item)])
+            picker.close()
+            self.nativeParentWidget().on_activated()
+
+        picker.itemActivated.connect(on_picked)
+        picker.itemClicked.connect(on_picked)
+        rect = self.view.visualRect(index)
+        picker.move(self.view.viewport().mapToGlobal(rect.bottomLeft()))
+        picker.show()
+
+    class View(QListView):
+        def keyPressEvent(self, event: QKeyEvent):
+            if event.key() == Qt.Key.Key_Menu:
+                return self.parent().pick_variant()
+            super().keyPressEvent(event)
+
+        def contextMenuEvent(self, event):
+            self.parent().pick_variant()
+
+    class VariantPicker(QListWidget):
+        """Popup grid of skin tone and gender variants `rows` of an emoji"""
+        MAX_COLUMNS = 6
+        MAX_ROWS = 5
+
+        def __init__(self, tab, rows):
+            super().__init__(
+                tab,
+                viewMode=QListWidget.ViewMode.IconMode,
+                movement=QListWidget.Movement.Static,
+                resizeMode=QListWidget.ResizeMode.Adjust,
+                uniformItemSizes=True,
+                textElideMode=Qt.TextElideMode.ElideNone,
+                horizontalScrollBarPolicy=Qt.ScrollBarPolicy.ScrollBarAlwaysOff,
+            )
+            self.setWindowFlags(Qt.WindowType.Popup)
+            font = QFont(tab.delegate.ICON_FONT)
+            font.setPixelSize(font.pixelSize() // 2)
+            self.setFont(font)
+            emoji_data = tab.model.emoji_data
+            for row in rows:
+                emoji, *strings = emoji_data[row]
+                item = QListWidgetItem(emoji, self)
+                item.setToolTip(next((i for i in strings if i), ''))
+            metrics = QFontMetrics(font)
+            cell = max(metrics.height(), *(metrics.horizontalAdvance(self.item(i).text())
+                                           for i in range(self.count()))) * 3 // 2
+            self.setGridSize(QSize(cell, cell))
+            n_columns = min(len(rows), self.MAX_COLUMNS)
+            n_rows = min(-(-len(rows) // n_columns), self.MAX_ROWS)
+            margin = 2 * self.frameWidth() + 2
+            self.resize(n_columns * cell + margin + self.verticalScrollBar().sizeHint().width(),
+                        n_rows * cell + margin)
+            self.setCurrentRow(0)
+
+    class Model(QAbstractListModel):
+        """
+        Flat list model of the emoji that match the current filter words.
+
+        Matching source rows are kept in a compact array. When they change,
+        the model emits the minimal `rowsRemoved` / `rowsInserted` runs
+        (or a `layoutChanged` with remapped persistent indexes when that
+        is cheaper) instead of invalidating the whole view.
+
+        Unless cached, emoji are parsed in a background thread and
+        appended to the model in chunks as they arrive.
+
+        Emoji are filtered by config, and of skin tone and gender variants,
+        only the one of the user's preference is shown (see `emoji_variants`).
+        Options changes only re-filter the loaded emoji.
+
+        Matches are ordered by relevance, except the most used emoji
+        that match come first (see `efck.usage`).
+
+        For painting, `LABEL_ROLE` provides the row's matched string and
+        its highlight spans, computed once per query.
+        """
+        filter_words = ()
+
+        LABEL_ROLE = Qt.ItemDataRole.UserRole + 1
+
+        #: Number of recent query results kept for backspacing / tab switches
+        RESULTS_CACHE_SIZE = 32
+        #: Above this many removed/inserted runs, emit a single layout change
+        MAX_DIFF_RUNS = 32
+        #: Number of most used emoji that come first
+        N_FREQUENT = 24
+        #: Below this many exact matches, typo-tolerant matches follow them
+        FUZZY_MIN_ROWS = 3
+
         def __init__(self, *args, **kwargs):
             super().__init__(*args, **kwargs)
-            self.emoji_data = ()
-
-        def init(self):
+            self.emoji_data = EmojiTable()
+            self._search_index = None
+            self._annotations = None  # Loaded in the background
+            self._annotations_loader = None
+            self._fuzzy_index = None
+            self._semantic_index = None
+            self._semantic_loader = None
+            self._semantic_search = False
+            self._variants = EmojiVariants(self.emoji_data)
+            self._preference = ()
+            self._frequent = None  # Rows of most used emoji
+            self._usage_version = None
+            self._rows = array('I')
+            self._results = OrderedDict()  # LRU of words -> matching rows
+            self._last_words = ()
+            self._loader = None
+            self._labels = {}  # Row -> (label, highlight spans) for current filter words
+            self._highlight_re = None
+
+        def init(self, *, config, **kwargs):
             logger.info('Reloading emoji ...')
-            self.emoji_data = enum_emojis()
+            self._preference = preference(config)
+            self._semantic_search = self._is_semantic(config)
+            if self._loader is not None:
+                self._loader.cancel()
+                self._loader = None
+            with phase('load emoji cache'):
+                emoji_data = load_cached_emojis()
+            if emoji_data is None:
+                emoji_data = EmojiTable()
+                self._load_start = now()
+                self._loader = run_in_thread(self, iter_emoji_chunks(), self._append_emojis,
+                                             on_finished=self._on_loaded)
+            if self._annotations is None and self._annotations_loader is None:
+                # Compiling annotation files takes a while on first run
+                self._annotations_loader = run_in_thread(
+                    self, map(load_annotations, [system_locales()]), self._set_annotations)
+            self.emoji_data = emoji_data
+            self._search_index = None
+            self._fuzzy_index = None
+            self._drop_semantic_index()
+            self._variants = EmojiVariants(emoji_data)
+            self._frequent = None
+            self._results.clear()
+            self._last_words = ()
+            self._labels.clear()
+            # Called within model reset, so no need to diff
+            self._rows = array('I', self._visible(self._search(self.filter_words)))
+            self._load_semantic_index()
+
+        def reconfigure(self, *, config, **kwargs):
+            self._preference = preference(config)
+            self._semantic_search = self._is_semantic(config)
+            self._load_semantic_index()
+            self._update_rows(array('I', self._visible(self._search(self.filter_words))))
+            return True
+
+        def _append_emojis(self, records):
+            self.emoji_data.extend(records)
+            if self._search_index is not None:
+                self._search_index.update()
+            if self._fuzzy_index is not None:
+                self._fuzzy_index.update()
+            self._drop_semantic_index()
+            self._variants.update()
+            self._frequent = None
+            # Cached results are incomplete now
+            self._results.clear()
+            self._last_words = ()
+
+            # New variants may replace shown ones, so diff
+            self._update_rows(array('I', self._visible(self._search(self.filter_words))))
+            tab = self.parent()
+            if not tab.view.currentIndex().isValid():
+                tab._reset_view_select_top_item()
+
+        def _on_loaded(self):
+            self._loader = None
+            record('enum emojis in background', self._load_start)
+            logger.info('Loaded %d emoji', len(self.emoji_data))
+            self._load_semantic_index()
+
+        def _set_annotations(self, annotations):
+            self._annotations = annotations
+            self._annotations_loader = None
+            logger.info('Loaded %d emoji annotation files', len(annotations))
+            if annotations:
+                self._drop_semantic_index()
+            self._load_semantic_index()
+            if not annotations or self._search_index is None:
+                return
+            self._search_index.set_annotations(annotations)
+            self._results.clear()
+            self._last_words = ()
+            if self.filter_words:
+                self._update_rows(array('I', self._visible(self._search(self.filter_words))))
+
+        @property
+        def search_index(self) -> EmojiIndex:
+            # Built lazily, on first search. Annotations are added once loaded.
+            if self._search_index is None:
+                self._search_index = EmojiIndex(self.emoji_data, self._annotations or ())
+            return self._search_index
+
+        @property
+        def fuzzy_index(self) -> FuzzyIndex:
+            # Built lazily, on first query with too few exact matches
+            if self._fuzzy_index is None:
+                with phase('build fuzzy emoji index'):
+                    self._fuzzy_index = FuzzyIndex(self.search_index)
+            return self._fuzzy_index
+
+        @staticmethod
+        def _is_semantic(config) -> bool:
+            return bool(config.get('Search', {}).get('semantic')) and is_semantic_available()
+
+        def _load_semantic_index(self):
+            # In semantic search mode, built in the background once all emoji
+            # and annotations are loaded. Until then, search is by keywords.
+            if (self._semantic_search and self._semantic_index is None and self._semantic_loader is None and
+                    self._loader is None and self._annotations_loader is None):
+                self._semantic_loader = run_in_thread(
+                    self, map(SemanticIndex, [self.emoji_data], [self._annotations or ()]),
+                    self._set_semantic_index)
+
+        def _set_semantic_index(self, index):
+            self._semantic_index = index
+            self._semantic_loader = None
+            if self._semantic_search and self.filter_words:
+                self._update_rows(array('I', self._visible(self._search(self.filter_words))))
+
+        def _drop_semantic_index(self):
+            if self._semantic_loader is not None:
+                self._semantic_loader.cancel()
+                self._semantic_loader = None
+            self._semantic_index = None
+
+        @property
+        def semantic_index(self) -> Optional[SemanticIndex]:
+            return self._semantic_index
 
         def rowCount(self, index):
-            return len(self.emoji_data)
+            return len(self._rows)
 
         def data(self, index, role):
             if role == Qt.ItemDataRole.DisplayRole:
-                emoji = self.emoji_data[index.row()][0]
-                return emoji
+                return self.emoji_data.field(self._rows[index.row()], 0)
             if role == Qt.ItemDataRole.UserRole:
-                return self.emoji_data[index.row()]
+                return self.emoji_data[self._rows[index.row()]]
+            if role == self.LABEL_ROLE:
+                return self._label(self._rows[index.row()])
             if role == Qt.ItemDataRole.ToolTipRole:
-                return '\n'.join(self.emoji_data[index.row()])
-
-    class Model(QSortFilterProxyModel):
-        filter_words = ()
-
-        def init(self, **kwargs):
-            self._model.init()
-
-        def __init__(self, *args, **kwargs):
-            super().__init__(*args, **kwargs)
-            self._model = EmojiTab.ListModel(parent=self)
-            self.setSourceModel(self._model)
+                return '\n'.join(self.emoji_data[self._rows[index.row()]])
+
+        def _label(self, row):
+            label = self._labels.get(row)
+            if label is None:
+                strings = self.emoji_data[row]
+                text = self.filter_words and first_matching_string(strings, self.filter_words)
+                if text:
+                    spans = [match.span() for match in self._highlight_re.finditer(text)]
+                else:
+                    # No query, or a typo-tolerant or other-language match
+                    text, spans = next(i for i in strings[1:] if i), ()
+                self._labels[row] = label = (text, spans)
+            return label
 
         def set_text(self, text):
-            self.filter_words = text.lower().split()
-            self.invalidateFilter()
-
-        def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
-            data = self._model.emoji_data[source_row]
-            return bool(self.first_matching_string(data, self.filter_words))
-
-        @staticmethod
-        def first_matching_string(strings, words) -> str:
-            # First of the strings (name, alt_name, shortcode) that contains
-            # ALL space-separated parts in any order
-            return next((s for s in strings
-                         if all(w in s for w in words)), None)
-
-        def beginResetModel(self):
-            super().beginResetModel()
-            self._model.beginResetModel()
-
-        def endResetModel(self):
-            super().endResetModel()
-            self._model.endResetModel()
-            self.invalidateFilter()
+            words = text.lower().split()
+            if words != self.filter_words:
+                self._labels.clear()
+                self._highlight_re = re.compile('|'.join(map(re.escape, words)), flags=re.I) if words else None
+            self.filter_words = words
+            self._update_rows(array('I', self._visible(self._search(words))))
+
+        def _visible(self, rows):
+            visible = self._variants.preferred(rows, *self._preference)
+            frequent = self._frequent_rows()
+            if not frequent:
+                return visible
+            # Most used variants that match the query come first,
+            # in place of their family's preferred variant of that gender
+            slot = self._variants.slot
+            shown = {slot(row) for row in visible}
+            if not isinstance(rows, range):
+                rows = set(rows)
+            first_rows = []
+            for row in frequent:
+                if slot(row) in shown and row in rows:
+                    shown.remove(slot(row))
+                    first_rows.append(row)
+            if not first_rows:
+                return visible
+            moved = {slot(row) for row in first_rows}
+            return first_rows + [row for row in visible if slot(row) not in moved]
+
+        def _frequent_rows(self) -> list:
+            store = usage_store()
+            store.refresh()
+            if self._frequent is None or self._usage_version != store.version:
+                self._usage_version = store.version
+                items = store.top(EmojiTab.__name__, self.N_FREQUENT)
+                emoji_data = self.emoji_data
+                row_of = {emoji_data.field(row, 0): row for row in range(len(emoji_data))} if items else {}
+                self._frequent = [row_of[item] for item in items if item in row_of]
+            return self._frequent
+
+        def variant_rows(self, index) -> list:
+            """Return rows of all variants of the emoji at `index`."""
+            return self._variants.members(self._rows[index.row()])
+
+        def set_variant(self, index, row):
+            """Show variant `row` at `index` until the next query."""
+            self._rows[index.row()] = row
+            self.dataChanged.emit(index, index)
+
+        def _search(self, words):
+            words = tuple(words)
+            if not words:
+                return range(len(self.emoji_data))
+            results = self._results
+            rows = results.get(words)
+            if rows is not None:
+                results.move_to_end(words)
+            else:
+                # Typing mostly extends the previous query. Then only
+                # narrow down the previous result.
+                last_words = self._last_words
+                within = (results.get(last_words)
+                          if last_words and refines(last_words, words) else
+                          None)
+                rows = self.search_index.search(words, within=within)
+                results[words] = rows
+                if len(results) > self.RESULTS_CACHE_SIZE:
+                    results.popitem(last=False)
+            self._last_words = words
+            ranked = self.search_index.rank(rows, words)
+            if self._semantic_search and self.semantic_index is not None:
+                # Most similar first, then the other keyword matches
+                similar = self.semantic_index.search(words)
+                similar_set = set(similar)
+                ranked = similar + [row for row in ranked if row not in similar_set]
+            # Words too short to correct don't need the fuzzy index built
+            if (len(ranked) < self.FUZZY_MIN_ROWS and
+                    any(len(word) >= FuzzyIndex.MIN_WORD_LENGTH for word in words)):
+                exact = set(ranked)
+                ranked += [row for row in self.fuzzy_index.search(words) if row not in exact]
+            return ranked
+
+        def _update_rows(self, new_rows: array):
+            old_rows = self._rows
+            if old_rows == new_rows:
+                return
+            old_set, new_set = set(old_rows), set(new_rows)
+            removed = _runs(i for i, row in enumerate(old_rows) if row not in new_set)
+            inserted = _runs(i for i, row in enumerate(new_rows) if row not in old_set)
+            if len(removed) + len(inserted) > self.MAX_DIFF_RUNS:
+                self._relayout(new_rows)
+                return
+
+            root = QModelIndex()
+            for first, last in reversed(removed):
+                self.beginRemoveRows(root, first, last)
+                del old_rows[first:last + 1]
+                self.endRemoveRows()
+            for first, last in inserted:
+                self.beginInsertRows(root, first, last)
+                old_rows[first:first] = new_rows[first:last + 1]
+                self.endInsertRows()
+            # Rows common to both are in a different order
+            if old_rows != new_rows:
+                self._relayout(new_rows)
+
+        def _relayout(self, new_rows: array):
+            self.layoutAboutToBeChanged.emit()
+            new_pos = {row: i for i, row in enumerate(new_rows)}
+            old_indexes = self.persistentIndexList()
+            new_indexes = []
+            for index in old_indexes:
+                pos = new_pos.get(self._rows[index.row()])
+                # Not `index()`, which is bounds-checked against the old rows
+                new_indexes.append(QModelIndex() if pos is None else self.createIndex(pos, 0))
+            self._rows = new_rows
+            self.changePersistentIndexList(old_indexes, new_indexes)
+            self.layoutChanged.emit()
 
     class Delegate(QStyledItemDelegate):
         GRID_CELL_SIZE_PX = 64
@@ -127,26 +542,109 @@ class EmojiTab(Tab):
         TEXT_OFFSET = _TEXT_OFFSET
         ICON_OFFSET = QPoint(0, _ICON_OFFSET)
 
-        _font_file = Path(__file__).parent.parent / 'NotoColorEmoji.ttf'
-        if _font_file.is_file():
-            logger.info('Loading vendored font NotoColorEmoji.ttf')
-            _res = QFontDatabase.addApplicationFont(str(_font_file))
-            if _res == -1:
-                logger.error('Error loading vendored font.')
+        #: Registered (off the startup path) if none of the above fonts is installed
+        VENDORED_FONT_FILE = Path(__file__).parent.parent / 'NotoColorEmoji.ttf'
 
         # Read user's font preference from the environment
         ICON_FONT_FAMILY = os.environ.get('ICON_FONT', ICON_FONT_FAMILY)
 
+        # Families are set to the installed ones by `_init_icon_font()`
         ICON_FONT = QFont()
-        ICON_FONT.setFamilies([ICON_FONT_FAMILY, *ALL_FONT_FAMILIES])
 
         filter_words = ()
-        highlight_words = lambda _, text: text
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._atlas = None
+            # Text layouts of the current query generation, dropped when it changes
+            self._layouts = {}
+            # While the icon font is yet to be probed or registered, glyph atlases
+            # aren't persisted, lest they cache glyphs of a fallback font
+            self._font_pending = True
+            self._init_icon_font()
+
+        def _init_icon_font(self):
+            """
+            Set `ICON_FONT` families to the installed ones, as found by a previous
+            run, or probe them after the window is shown. Missing families would
+            make Qt populate font family aliases, which is slow.
+            If no preferred family is installed, the vendored font is read in
+            a background thread, registered, and the view repainted.
+            """
+            key = self._font_cache_key()
+            cached = _load_font_cache(key)
+            if cached:
+                self._set_icon_font(cached['families'], cached['vendored'])
+            else:
+                QTimer.singleShot(0, lambda: self._probe_icon_font(key))
+
+        def _font_cache_key(self):
+            file = self.VENDORED_FONT_FILE
+            stat = file.stat() if file.is_file() else None
+            return [QT_VERSION_STR, QGuiApplication.platformName(),
+                    self.ICON_FONT_FAMILY, list(self.ALL_FONT_FAMILIES),
+                    stat and [stat.st_size, stat.st_mtime_ns], _font_dirs_mtimes()]
+
+        def _probe_icon_font(self, key):
+            with phase('probe font families'):
+                installed = set(font_families())
+            families = [family for family in dict.fromkeys([self.ICON_FONT_FAMILY, *self.ALL_FONT_FAMILIES])
+                        if family in installed]
+            vendored = self.ICON_FONT_FAMILY not in installed and self.VENDORED_FONT_FILE.is_file()
+            logger.info('Installed emoji font families: %s, using vendored font: %s', families, vendored)
+            _dump_font_cache(key, families=families, vendored=vendored)
+            self._set_icon_font(families, vendored)
+
+        def _set_icon_font(self, families, vendored):
+            if vendored:
+                logger.info('Loading vendored font %s', self.VENDORED_FONT_FILE.name)
+                run_in_thread(self, map(Path.read_bytes, [self.VENDORED_FONT_FILE]),
+                              lambda data: self._register_font(data, families))
+            self._font_pending = vendored
+            self.ICON_FONT.setFamilies(families or [self.ICON_FONT_FAMILY])
+            self._repaint()
+
+        def _register_font(self, data, families):
+            with phase('register vendored font'):
+                font_id = QFontDatabase.addApplicationFontFromData(data)
+            self._font_pending = False
+            if font_id == -1:
+                logger.error('Error loading vendored font.')
+                return
+            vendored_families = QFontDatabase.applicationFontFamilies(font_id)
+            self.ICON_FONT.setFamilies([*vendored_families, *families])
+            self._repaint()
+
+        def _repaint(self):
+            self._layouts.clear()
+            self._drop_atlas()
+            self.parent().view.viewport().update()
+
+        def _glyph_atlas(self, painter, option) -> GlyphAtlas:
+            dpr = painter.device().devicePixelRatioF()
+            atlas = self._atlas
+            if atlas is None or atlas.dpr != dpr:
+                self._drop_atlas()
+                cell_size = QSize(self.GRID_SIZE.width(), QFontMetrics(self.ICON_FONT).height())
+                color = option.palette.color(QPalette.ColorRole.Text)
+                self._atlas = atlas = GlyphAtlas(self.ICON_FONT, cell_size, dpr, color,
+                                                 persistent=not self._font_pending)
+            return atlas
+
+        def _drop_atlas(self):
+            if self._atlas is not None:
+                self._atlas.save()
+                self._atlas = None
+
+        def _save_atlas(self):
+            if self._atlas is not None:
+                self._atlas.save()
 
         def set_text(self, text):
-            self.filter_words = words = text.lower().split()
-            find_words_re = re.compile(fr'({"|".join(map(re.escape, words))})', flags=re.I)
-            self.highlight_words = lambda text: find_words_re.sub(r'<b>\1</b>', text)
+            words = text.lower().split()
+            if words != self.filter_words:
+                self._layouts.clear()
+            self.filter_words = words
 
         def init(self, *, config, zoom, **kwargs):
             assert .5 < zoom <= 2
@@ -161,7 +659,8 @@ class EmojiTab(Tab):
             self.ICON_OFFSET = zoom * QPoint(0, self._ICON_OFFSET)
             self.TEXT_OFFSET = zoom * self._TEXT_OFFSET
 
-            self._StaticText.cache_clear()
+            self._layouts.clear()
+            self._drop_atlas()
 
             # Make sure the view calls sizeHint() again
             # Fixes "Resetting zoom back from 200% to 100% doesn't work"
@@ -170,13 +669,26 @@ class EmojiTab(Tab):
         def sizeHint(self, option, index):
             return self.GRID_SIZE
 
-        @lru_cache(5000)
-        def _StaticText(self, text):
-            s = QStaticText(text)
-            s.setTextFormat(Qt.TextFormat.RichText if '<' in text else Qt.TextFormat.PlainText)
-            s.setPerformanceHint(QStaticText.PerformanceHint.AggressiveCaching)
-            s.setTextWidth(self.GRID_SIZE.width())
-            s.setTextOption(QTextOption(Qt.AlignmentFlag.AlignHCenter))
+        def _layout(self, text, spans=()) -> QStaticText:
+            key = (text, *spans)
+            s = self._layouts.get(key)
+            if s is None:
+                if spans:
+                    # Bold highlighted spans
+                    parts, end = [], 0
+                    for start, stop in spans:
+                        parts += [html.escape(text[end:start]), '<b>', html.escape(text[start:stop]), '</b>']
+                        end = stop
+                    parts.append(html.escape(text[end:]))
+                    s = QStaticText(''.join(parts))
+                    s.setTextFormat(Qt.TextFormat.RichText)
+                else:
+                    s = QStaticText(text)
+                    s.setTextFormat(Qt.TextFormat.PlainText)
+                s.setPerformanceHint(QStaticText.PerformanceHint.AggressiveCaching)
+                s.setTextWidth(self.GRID_SIZE.width())
+                s.setTextOption(QTextOption(Qt.AlignmentFlag.AlignHCenter))
+                self._layouts[key] = s
             return s
 
         def paint(self, painter: QPainter, option, index: QModelIndex):
@@ -186,22 +698,26 @@ class EmojiTab(Tab):
                 painter.fillRect(option.rect, option.palette.highlight())
                 painter.setPen(option.palette.color(QPalette.ColorRole.HighlightedText))
 
-            data = index.data(Qt.ItemDataRole.UserRole)
+            emoji = index.data(Qt.ItemDataRole.DisplayRole)
 
-            text = self._StaticText(data[0])
-            painter.setFont(self.ICON_FONT)
             # FIXME: Figure out how to better present multi-emoji strings
             #  such as custom emoji ('😂🔫') or emoji that doesn't yet render
             #  as a single glyph ('👨🏿‍❤️‍💋‍👨🏿') ...
             #  ICON_FONT.setLetterSpacing() was researched but makes an issue of
             #  combining characters, moving the text rect ever more to the left.
-            painter.drawStaticText(option.rect.topLeft() + self.ICON_OFFSET, text)
-
-            text = next(i for i in data[1:] if i)
-            if self.filter_words:
-                text = EmojiTab.Model.first_matching_string(data, self.filter_words)
-            text = self.highlight_words(text)
-            text = self._StaticText(text)
+            top_left = option.rect.topLeft() + self.ICON_OFFSET
+            if option.state & QStyle.StateFlag.State_Selected:
+                # Non-color glyphs take the highlighted text color
+                painter.setFont(self.ICON_FONT)
+                painter.drawStaticText(top_left, self._layout(emoji))
+            else:
+                atlas = self._glyph_atlas(painter, option)
+                n_glyphs = len(atlas)
+                atlas.draw(painter, top_left, emoji)
+                if len(atlas) != n_glyphs:
+                    fire_after(self, '_save_atlas_timer', self._save_atlas, 3000)
+
+            text = self._layout(*index.data(EmojiTab.Model.LABEL_ROLE))
             top_left = option.rect.topLeft() + QPoint(0, int(round(self.ICON_FONT.pixelSize() + self.TEXT_OFFSET)))
             painter.setFont(self.TEXT_FONT)
             painter.setClipRect(option.rect)
@@ -246,5 +762,10 @@ class EmojiTab(Tab):
                     li = QListWidgetItem(filter_label(k))
                     lst.addItem(li)
                     li.setToolTip(k)
+                    if (group_name, k) == ('Search', 'semantic'):
+                        li.setToolTip('Find emoji by similar meaning, e.g. "party" or "sad"')
+                        if not is_semantic_available():
+                            li.setToolTip('Requires NumPy')
+                            li.setFlags(li.flags() & ~Qt.ItemFlag.ItemIsEnabled)
                     li.setSelected(bool(v))  # This needs to come after item is added
                 lst.blockSignals(False)
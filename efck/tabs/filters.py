@@ -1,45 +1,27 @@
 import logging
-from functools import lru_cache
+import re
 
 from ..qt import *
-from ..gui import ICON_DIR
+from ..filter_modules import CHAIN_SEPARATOR, load_chains, load_modules, module_basename
+from ..filter_sandbox import FilterDisabled, FilterError, FilterSandbox, module_origins, needs_sandbox
+from ..gui import ICON_DIR, run_in_thread
 from ..tab import Tab
-from ..util import iter_config_dirs, iter_modules_from_dir
 
 logger = logging.getLogger(__name__)
 
-
-def load_modules():
-    """Return built-in filter modules, shadowed by name by user's config-local filter modules."""
-    all_modules = {}
-
-    for dir in iter_config_dirs('filters'):
-        for module in iter_modules_from_dir(dir, 'efck.filters.'):
-            all_modules[module_basename(module)] = module
-
-    # Empty user's config-local filters by the same name can shadow out builtins
-    for name, mod in tuple(all_modules.items()):
-        if not callable(getattr(mod, 'func', None)):
-            logger.warning('Skipping invalid module "%s" from "%s"', name, mod.__spec__.origin)
-            all_modules.pop(name)
-
-    # Cache filter transformations
-    for name, mod in all_modules.items():
-        if name != 'zalgo':  # Except Zalgo text
-            mod.func = lru_cache(3)(mod.func)
-
-    modules = list(dict(sorted(all_modules.items())).values())
-    return modules
-
-
-def module_basename(module):
-    name = module.__name__.rsplit('.', maxsplit=1)[1]
-    return name
+# Read by `efck.tabs` without importing this module
+TAB_MANIFEST = {
+    'class': 'FiltersTab',
+    'label': '&Filters',
+    'icon_theme': 'format-text-strikethrough',
+    'icon': 'strikethrough.png',
+    'order': 20,
+}
 
 
 class FiltersTab(Tab):
-    label = '&Filters'
-    icon = QIcon.fromTheme('format-text-strikethrough', QIcon(QPixmap(str(ICON_DIR / 'strikethrough.png'))))
+    label = TAB_MANIFEST['label']
+    icon = QIcon.fromTheme(TAB_MANIFEST['icon_theme'], QIcon(QPixmap(str(ICON_DIR / TAB_MANIFEST['icon']))))
     line_edit_kwargs = dict(
         placeholderText='Enter text to transform ...',
     )
@@ -47,26 +29,64 @@ class FiltersTab(Tab):
     line_edit_ignore_keys = Tab.line_edit_ignore_keys
     line_edit_resets_selection = False
 
+    def activated_item(self):
+        return self.view.currentIndex().data()
+
     def activated(self, force_clipboard, **kwargs):
         from ..output import type_chars
-        func = self.view.currentIndex().data(Qt.ItemDataRole.UserRole)
-        text = func(self.line_edit.text())
-        type_chars(text, force_clipboard)
+        text = self.line_edit.text()
+        # The preview, unless the query changed since it was shown
+        self.model.set_text(text)
+        type_chars(self.model.output(self.view.currentIndex().row()) if text else '', force_clipboard)
 
     class Model(QAbstractListModel):
+        """
+        Filters, followed by the user's filter chains (e.g. "bold+underline"),
+        with their outputs for the current query, each computed
+        once per query, in a background thread if the query is long.
+        User's (non-declarative) filters run in a `FilterSandbox` instead.
+        Views show `OutputRole`, which is also what gets typed out,
+        so even random filters (like Zalgo) type what they show.
+        """
+        ExampleRole = Qt.ItemDataRole.UserRole + 1
+        OutputRole = Qt.ItemDataRole.UserRole + 2
+        #: `filter_sandbox.SLOW` or `.DISABLED` if the sandboxed filter missed its deadline(s)
+        StatusRole = Qt.ItemDataRole.UserRole + 3
+
+        #: Queries at least this long are transformed in a background thread
+        THREAD_MIN_LENGTH = 2000
+        #: Shown while the output is being computed
+        PENDING = '…'
+
         def __init__(self, *args, **kwargs):
             super().__init__(*args, **kwargs)
-            self.modules = ()
-
-        def init(self, **kwargs):
-            if not self.modules:
-                self.modules = load_modules()
+            self.modules = ()  # Filter modules and `FilterChain`s
+            self._filters = ()
+            self._sandboxed = {}  # Row -> `module_origins()` of sandboxed filters
+            self._sandbox = None
+            self._text = None
+            self._outputs = {}  # Row -> output for `_text` (or the example if empty)
+            self._workers = []  # `ThreadDelivery`s of `run_in_thread()`
+
+        def init(self, config, **kwargs):
+            if not self._filters:
+                self._filters = load_modules()
+            self.modules = self._filters + load_chains(config.get('chains', ()), self._filters)
+            self._sandboxed = {row: module_origins(module)
+                               for row, module in enumerate(self.modules) if needs_sandbox(module)}
+            if self._sandboxed and self._sandbox is None:
+                self._sandbox = FilterSandbox()
+                # Kill its worker processes with the tab, or the app
+                self.destroyed.connect(lambda _, sandbox=self._sandbox: sandbox.close())
+                QApplication.instance().aboutToQuit.connect(self._sandbox.close)
+            # Outputs are computed anew on `set_text()`
+            self._stop_workers()
+            self._text = None
+            self._outputs = {}
 
         def rowCount(self, index):
             return len(self.modules)
 
-        ExampleRole = Qt.ItemDataRole.UserRole + 1
-
         def data(self, index, role):
             if role == Qt.ItemDataRole.DisplayRole:
                 module = self.modules[index.row()]
@@ -74,8 +94,84 @@ class FiltersTab(Tab):
             if role == Qt.ItemDataRole.UserRole:
                 return self.modules[index.row()].func
             if role == self.ExampleRole:
-                module = self.modules[index.row()]
-                return getattr(module, 'example', None) or module_basename(module).title()
+                return self._example(index.row())
+            if role == self.OutputRole:
+                return self._outputs.get(index.row(), self.PENDING)
+            if role == self.StatusRole:
+                origins = self._sandboxed.get(index.row())
+                return origins and self._sandbox.status(origins)
+
+        def _example(self, row):
+            module = self.modules[row]
+            return getattr(module, 'example', None) or module_basename(module).title()
+
+        def _transform(self, row, text):
+            text = text or self._example(row)
+            try:
+                origins = self._sandboxed.get(row)
+                if origins:
+                    return self._sandbox.call(origins, text)
+                return self.modules[row].func(text)
+            except (FilterError, TimeoutError) as e:
+                logger.warning('Error in filter "%s": %r', module_basename(self.modules[row]), e)
+                return ''
+            except Exception:
+                logger.exception('Error in filter "%s"', module_basename(self.modules[row]))
+                return ''
+
+        def set_text(self, text):
+            if text == self._text:
+                return  # Keep outputs, e.g. of random filters
+            self._text = text
+            self._outputs = {}
+            self._stop_workers()
+            rows = [row for row in range(len(self.modules)) if row not in self._sandboxed]
+            if len(text) < self.THREAD_MIN_LENGTH:
+                self._outputs = {row: self._transform(row, text) for row in rows}
+            else:
+                self._start_worker((row, self._transform(row, text)) for row in rows)
+            if self._sandboxed:
+                self._start_worker(self._sandbox.map(
+                    (row, origins, text or self._example(row)) for row, origins in self._sandboxed.items()))
+            self._emit_changed()  # Pending rows, too
+
+        def _start_worker(self, results):
+            def on_output(item):
+                row, output = item
+                if isinstance(output, Exception):
+                    if not isinstance(output, FilterDisabled):
+                        logger.warning('Error in filter "%s": %r', module_basename(self.modules[row]), output)
+                    output = ''
+                # Unless already computed on demand by `output()`
+                if row not in self._outputs:
+                    self._outputs[row] = output
+                    self.dataChanged.emit(self.index(row, 0), self.index(row, 0))
+
+            def on_finished():
+                self._workers.remove(worker)
+
+            worker = run_in_thread(self, results, on_output, on_finished=on_finished)
+            self._workers.append(worker)
+
+        def _stop_workers(self):
+            # Also stops their threads, after their current filter
+            for worker in self._workers:
+                worker.cancel()
+            self._workers = []
+            if self._sandbox is not None:
+                self._sandbox.cancel()
+
+        def _emit_changed(self):
+            if self.modules:
+                self.dataChanged.emit(self.index(0, 0), self.index(len(self.modules) - 1, 0))
+
+        def output(self, row) -> str:
+            """Return output of filter `row` for the current query, as shown."""
+            output = self._outputs.get(row)
+            if output is None:
+                output = self._outputs[row] = self._transform(row, self._text)
+                self.dataChanged.emit(self.index(row, 0), self.index(row, 0))
+            return output
 
     class Delegate(QStyledItemDelegate):
         SIZE = QSize(0, 40)
@@ -95,16 +191,41 @@ class FiltersTab(Tab):
                 painter.fillRect(option.rect, option.palette.highlight())
                 painter.setPen(option.palette.color(QPalette.ColorRole.HighlightedText))
 
-            func = index.data(Qt.ItemDataRole.UserRole)
-            text = self.parent().line_edit.text() or index.data(FiltersTab.Model.ExampleRole)
-            text = func(text)
+            text = index.data(FiltersTab.Model.OutputRole)
             rect = option.rect.adjusted(2, 2, -2, -2)
             text = self.FONT_METRICS.elidedText(text, Qt.TextElideMode.ElideRight, rect.width())
             painter.setFont(self.FONT_TEXT)
             painter.drawText(rect, Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignLeft, text)
 
             name = index.data().replace('_', ' ')
+            status = index.data(FiltersTab.Model.StatusRole)
+            if status:
+                name = f'{name} ({status})'
             painter.setFont(self.FONT_NAME)
             painter.drawText(rect, Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignRight, name.upper())
 
             painter.restore()
+
+    class Options(QWidget):
+        def __init__(self, *args, config, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.setLayout(QHBoxLayout(self))
+
+            def on_edited(text):
+                # Sync options directly with the config state
+                text = re.sub(rf'\s*{re.escape(CHAIN_SEPARATOR)}\s*', CHAIN_SEPARATOR, text)
+                config['chains'] = [chain for chain in re.split(r'[\s,]+', text) if chain]
+                logger.debug('Filter chains: %s', config['chains'])
+
+            line_edit = QLineEdit(
+                ' '.join(config['chains']),
+                parent=self,
+                placeholderText=f'e.g. bold{CHAIN_SEPARATOR}underline',
+                toolTip='Space-separated chains of filters to apply in order, '
+                        f'shown after the filters, e.g. "bold{CHAIN_SEPARATOR}underline"',
+                textEdited=on_edited,
+            )
+            label = QLabel('Filter c&hains:', self)
+            label.setBuddy(line_edit)
+            self.layout().addWidget(label)
+            self.layout().addWidget(line_edit)
@@ -1,6 +1,5 @@
 import atexit
 import json
-import locale
 import logging
 import os
 import re
@@ -13,11 +12,22 @@ from urllib.parse import quote
 
 from .. import IS_MACOS, __website__
 from ..qt import *
+from ..qt import QNetworkAccessManager, QNetworkReply, QNetworkRequest  # Lazily imported
 from ..gui import ICON_DIR, fire_after
 from ..tab import Tab
+from ..util import system_locales
 
 logger = logging.getLogger(__name__)
 
+# Read by `efck.tabs` without importing this module
+TAB_MANIFEST = {
+    'class': 'GifsTab',
+    'label': '&GIFs',
+    'icon_theme': 'image-x-generic',
+    'icon': 'gifs.png',
+    'order': 30,
+}
+
 
 @lru_cache(1)
 def _anon_id():
@@ -179,8 +189,8 @@ def _remove_file(filename):
 
 
 class GifsTab(Tab):
-    label = '&GIFs'
-    icon = QIcon.fromTheme('image-x-generic', QIcon(QPixmap(str(ICON_DIR / 'gifs.png'))))
+    label = TAB_MANIFEST['label']
+    icon = QIcon.fromTheme(TAB_MANIFEST['icon_theme'], QIcon(QPixmap(str(ICON_DIR / TAB_MANIFEST['icon']))))
     line_edit_kwargs = dict(
         placeholderText='Enter search text ...',
     )
@@ -373,7 +383,7 @@ class GifsTab(Tab):
             self._reset_model()
 
             query = quote(text)
-            locales = {QLocale.system().name(), locale.getlocale()[0]} - {None}  # None on "C" locale
+            locales = system_locales()
             if not any(lc.startswith('en') for lc in locales):
                 locales.add('en_US')
 
@@ -7,6 +7,7 @@ from unittest import TestCase
 from . import CONFIG_DIRS, IS_MACOS, IS_X11, IS_WIDOWS
 from .gui import LineEdit as AppLineEdit, MainWindow
 from .qt import *
+from .qt import QTest  # Lazily imported
 
 
 MIN_DELAY_MS = 100
@@ -174,6 +175,19 @@ class TestConfig(TestCase):
         path = dump_config()
         self.assertTrue(path, path)
 
+    def test_merge_defaults(self):
+        from .config import _merge_defaults, config_state
+
+        # Config of an earlier version
+        config = {'EmojiTab': {'Skin': {'dark skin tone': 1}}, 'zoom': 120}
+        _merge_defaults(config, config_state)
+        self.assertEqual(config['zoom'], 120)
+        self.assertEqual(config['EmojiTab']['Skin']['dark skin tone'], 1)
+        self.assertEqual(config['EmojiTab']['Skin']['light skin tone'], 0)
+        self.assertEqual(config['EmojiTab']['Search'], config_state['EmojiTab']['Search'])
+        self.assertIsNot(config['EmojiTab']['Search'], config_state['EmojiTab']['Search'])
+        self.assertEqual(config['FiltersTab']['chains'], config_state['FiltersTab']['chains'])
+
 
 class TestEmoji(TestCase):
     def test_enum_emoji(self):
@@ -182,17 +196,499 @@ class TestEmoji(TestCase):
         emojis = enum_emojis()
         self.assertGreater(len(emojis), 1000)
         self.assertGreater(len(emojis[0]), 3)
+        self.assertEqual(emojis[0][0], emojis.field(0, 0))
+        self.assertEqual(emojis[-1], list(emojis)[-1])
+
+    def test_enum_emoji_cache(self):
+        from .emoji import enum_emojis, _cache_file
+
+        emojis = enum_emojis()
+        self.assertTrue(_cache_file().is_file())
+        self.assertEqual(enum_emojis(), emojis)
+
+    def test_iter_emoji_chunks(self):
+        from .emoji import EmojiTable, enum_emojis, iter_emoji_chunks
+
+        emojis = EmojiTable()
+        for chunk in iter_emoji_chunks(chunk_size=100):
+            self.assertLessEqual(len(chunk), 100)
+            emojis.extend(chunk)
+        self.assertEqual(emojis, enum_emojis())
+
+    def test_search_index(self):
+        from .emoji import enum_emojis
+        from .emoji_index import EmojiIndex, first_matching_string, refines
+
+        emojis = enum_emojis()
+        index = EmojiIndex(emojis)
+        for query in ('', 'a', 'avo', 'heart', 'smil fac', 'face smil', ':)', 'zzzz'):
+            words = query.split()
+            expected = [row for row, strings in enumerate(emojis)
+                        if first_matching_string(strings, words)]
+            self.assertEqual(index.search(words), expected, query)
+
+        # Refined queries narrow down the previous result
+        prev_words, prev_rows = [], None
+        for query in ('a', 'av', 'avo', 'avoc', 'fac', 'fac smi', 'face smil'):
+            words = query.split()
+            within = prev_rows if refines(prev_words, words) else None
+            self.assertEqual(index.search(words, within=within), index.search(words), query)
+            prev_words, prev_rows = words, index.search(words)
+        self.assertFalse(refines(['avo'], ['av']))
+
+        # Relevance ranking reorders, exact shortcode first
+        for query, top in (('heart', '\N{HEAVY BLACK HEART}'),
+                           ('cat', '\N{CAT FACE}'),
+                           ('smil fac', '\N{WHITE SMILING FACE}')):
+            words = query.split()
+            rows = index.search(words)
+            ranked = index.rank(rows, words)
+            self.assertEqual(sorted(ranked), rows)
+            self.assertEqual(emojis.field(ranked[0], 0), top, query)
+
+    def test_fuzzy_search(self):
+        from .emoji import enum_emojis
+        from .emoji_fuzzy import FuzzyIndex, prefix_edit_distance
+        from .emoji_index import EmojiIndex
+
+        self.assertEqual(prefix_edit_distance('avacado', 'avocado', 2), 1)
+        self.assertEqual(prefix_edit_distance('avoc', 'avocado', 2), 0)
+        self.assertEqual(prefix_edit_distance('xyz', 'avocado', 2), 3)
+
+        emojis = enum_emojis()
+        fuzzy = FuzzyIndex(EmojiIndex(emojis))
+        for query, top in (('avacado', '\N{AVOCADO}'),
+                           ('thumbs upp', '\N{THUMBS UP SIGN}'),
+                           ('unicron', '\N{UNICORN FACE}'),
+                           ('red hert', '\N{HEAVY BLACK HEART}')):
+            words = query.split()
+            rows = fuzzy.search(words)
+            self.assertEqual(emojis.field(rows[0], 0), top, query)
+        self.assertEqual(fuzzy.search(['xqzjv']), [])
+        self.assertEqual(fuzzy.search(['zz']), [])
+
+    def test_model_fuzzy_search(self):
+        import statistics
+        import time
+        from unittest.mock import patch
+        from .config import config_state
+        from .emoji import enum_emojis
+        from .emoji_fuzzy import FuzzyIndex
+        from .tabs import emoji
+
+        enum_emojis()  # Fills the disk cache, which the model loads
+        model = emoji.EmojiTab.Model()
+        model.init(config=config_state['EmojiTab'])
+        with patch.object(emoji, 'FuzzyIndex', wraps=FuzzyIndex) as fuzzy_index:
+            fuzzy_index.MIN_WORD_LENGTH = FuzzyIndex.MIN_WORD_LENGTH
+            # Words too short to correct don't build the fuzzy index
+            model.set_text('zq')
+            self.assertEqual(model.rowCount(None), 0)
+            fuzzy_index.assert_not_called()
+
+            # Typo-tolerant matches follow too few exact ones, as you type
+            durations = []
+            for query, top in (('unicron', '\N{UNICORN FACE}'),
+                               ('avacado', '\N{AVOCADO}'),
+                               ('thumbs upp', '\N{THUMBS UP SIGN}'),
+                               ('red hert', '\N{HEAVY BLACK HEART}'),
+                               ('smiel', None)):
+                start = time.perf_counter()
+                model.set_text(query)
+                durations.append(time.perf_counter() - start)
+                self.assertTrue(model.rowCount(None), query)
+                if top:
+                    self.assertEqual(model.index(0, 0).data(), top, query)
+            fuzzy_index.assert_called_once()
+        self.assertLess(statistics.median(durations), AppLineEdit.TIMEOUT_INTERVAL / 1000 / 4)
+
+    def test_annotations(self):
+        import tempfile
+        from .emoji import enum_emojis
+        from .emoji_annotations import load_annotations
+        from .emoji_index import EmojiIndex
+
+        xml = '''<?xml version="1.0" encoding="UTF-8" ?>
+<ldml><annotations>
+    <annotation cp="👍">+1 | Daumen | Daumen hoch | gut</annotation>
+    <annotation cp="👍" type="tts">Daumen hoch</annotation>
+    <annotation cp="☺">Lächeln | ↑↑↑</annotation>
+    <annotation cp="😺">Katze | lachen</annotation>
+</annotations></ldml>'''
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            (tmpdir / 'de.xml').write_text(xml, encoding='utf-8')
+            (tmpdir / 'sl.xml').write_text(xml.replace('Daumen', 'palec'), encoding='utf-8')
+            annotations = load_annotations(['de_AT'], dirs=[tmpdir], index_dir=tmpdir / 'index')
+            self.assertEqual([i.source.name for i in annotations], ['de.xml'])
+            self.assertEqual(annotations[0].search(['daumen', 'hoch']), {'👍'})
+            self.assertEqual(annotations[0].search(['lächeln']), set())  # Inherited
+            self.assertEqual(annotations[0].search(['palec']), set())
+            # Compiled index is reused
+            index_file, = (tmpdir / 'index').iterdir()
+            mtime = index_file.stat().st_mtime_ns
+            load_annotations(['de'], dirs=[tmpdir], index_dir=tmpdir / 'index')
+            self.assertEqual(index_file.stat().st_mtime_ns, mtime)
+
+            emojis = enum_emojis()
+            index = EmojiIndex(emojis, annotations)
+            # Skin tone variants match too, merged into English matches
+            rows = index.search(['daumen'])
+            self.assertEqual({emojis.field(row, 0)[0] for row in rows}, {'\N{THUMBS UP SIGN}'})
+            self.assertEqual(len(rows), 6)
+            cat_row = next(row for row in range(len(emojis)) if emojis.field(row, 0) == '😺')
+            self.assertEqual(index.search(['kat']), sorted({*EmojiIndex(emojis).search(['kat']), cat_row}))
+            self.assertEqual(index.search(['katze'], within=[cat_row]), [cat_row])
+            self.assertEqual(annotations[0].search(['katze'], among={'😺', '👍'}), {'😺'})
+            self.assertEqual(annotations[0].search(['katze'], among={'👍'}), set())
+            # Too short words don't search annotations
+            self.assertNotIn(cat_row, index.search(['ka']))
+            # Annotations loaded later
+            index = EmojiIndex(emojis)
+            index.set_annotations(annotations)
+            self.assertIn(cat_row, index.search(['katze']))
+            del index, annotations  # Unmap before cleanup
+
+    def test_semantic_search(self):
+        import statistics
+        import tempfile
+        import time
+        from .emoji import enum_emojis
+        from .emoji_annotations import load_annotations
+        from .emoji_semantic import SemanticIndex, is_available
+
+        if not is_available():
+            self.skipTest('NumPy not installed')
+        # As in CLDR English annotations
+        xml = '''<?xml version="1.0" encoding="UTF-8" ?>
+<ldml><annotations>
+    <annotation cp="🎉">celebration | party | popper | ta-da | tada</annotation>
+    <annotation cp="🎊">ball | celebration | confetti</annotation>
+    <annotation cp="🥳">celebration | hat | horn | party | partying face</annotation>
+</annotations></ldml>'''
+        emojis = enum_emojis()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            (tmpdir / 'en.xml').write_text(xml, encoding='utf-8')
+            annotations = load_annotations(['en'], dirs=[tmpdir], index_dir=tmpdir / 'index')
+            cache_file = tmpdir / 'semantic.npz'
+            SemanticIndex(emojis, annotations, cache_file=cache_file)
+            mtime = cache_file.stat().st_mtime_ns
+            index = SemanticIndex(emojis, annotations, cache_file=cache_file)
+            self.assertEqual(cache_file.stat().st_mtime_ns, mtime)
+        for query, expected in (('party', '🎉🥳'),
+                                ('celebrating', '🎉🎊🥳'),
+                                ('sad', '😢😞')):
+            words = query.split()
+            top = {emojis.field(row, 0) for row in index.search(words)[:5]}
+            self.assertLessEqual(set(expected), top, query)
+            durations = []
+            for _ in range(5):
+                start = time.perf_counter()
+                index.search(words)
+                durations.append(time.perf_counter() - start)
+            self.assertLess(statistics.median(durations), AppLineEdit.TIMEOUT_INTERVAL / 1000 / 4, query)
+        self.assertEqual(index.search(['qxjv']), [])
 
     def test_no_judge(self):
         from .emoji import enum_emojis
-        from .config import _gender
+        from .emoji_variants import EmojiVariants
 
-        # Test disabled neuter professions are not present
-        _gender.update({'person': 0, 'man': 0, 'woman': 1})
         emojis = enum_emojis()
-        judge = [i[1] for i in emojis if 'judge' in i[1]]
+        variants = EmojiVariants(emojis)
+        judges = [row for row, strings in enumerate(emojis) if 'judge' in strings[1]]
+        self.assertEqual(variants.members(judges[-1]), judges)
+
+        # Test disabled neuter professions are not present
+        judge = variants.preferred(judges, genders=('woman',))
         self.assertEqual(len(judge), 1)
-        self.assertIn('woman', judge[0])
+        self.assertIn('woman', emojis[judge[0]][1])
+
+        # Each enabled gender adds its variant, in the preferred skin tone
+        judge = variants.preferred(judges, ('\N{EMOJI MODIFIER FITZPATRICK TYPE-4}',), ('person', 'woman'))
+        self.assertEqual([emojis.field(row, 0) for row in judge], ['🧑🏽‍⚖️', '👩🏽‍⚖️'])
+
+    def test_variant_families(self):
+        from .emoji import enum_emojis
+        from .config import config_state
+        from .emoji_variants import BITS, EmojiVariants, family_key, preference
+
+        self.assertEqual(family_key('👩🏽‍⚕️'), family_key('🧑‍⚕️'))
+        self.assertEqual(family_key('👩🏻‍❤️‍👨🏼'), family_key('👩‍❤️‍👨'))
+        # Families and couples of different genders aren't variants
+        self.assertEqual(len({family_key(emoji) for emoji in ['👨‍👩‍👦', '👨‍👨‍👦', '👩‍👩‍👦']}), 3)
+        self.assertEqual(len({family_key(emoji) for emoji in ['👩‍❤️‍👨', '👨‍❤️‍👨', '👩‍❤️‍👩']}), 3)
+
+        emojis = enum_emojis()
+        variants = EmojiVariants(emojis)
+        rows = range(len(emojis))
+        genders = ('person', 'man', 'woman')
+        # Emoji of only skin tones are hidden unless the tones are enabled
+        toned = ['\N{EMOJI MODIFIER FITZPATRICK TYPE-1-2}', '🫱🏻‍🫲🏼', '🧑🏻‍❤️‍🧑🏼']
+        shown = {emojis.field(row, 0) for row in variants.preferred(rows, (), genders)}
+        self.assertFalse(shown & set(toned))
+        light_tones = ('\N{EMOJI MODIFIER FITZPATRICK TYPE-1-2}', '\N{EMOJI MODIFIER FITZPATRICK TYPE-3}')
+        shown = {emojis.field(row, 0) for row in variants.preferred(rows, light_tones, genders)}
+        self.assertLessEqual(set(toned), shown)
+
+        # Gender signs are gendered only as markers of joined sequences
+        bits = {emojis.field(row, 0): variants.bits(row) for row in rows}
+        self.assertTrue(bits['🏃‍♀️'] & BITS['woman'])
+        self.assertFalse(bits['\N{FEMALE SIGN}'] & BITS['woman'])
+        shown = {emojis.field(row, 0) for row in variants.preferred(rows, *preference(config_state['EmojiTab']))}
+        self.assertLessEqual({'\N{FEMALE SIGN}', '\N{MALE SIGN}'}, shown)
+
+    def test_font_dirs_mtimes(self):
+        from .tabs.emoji import _font_dirs_mtimes
+
+        # In test mode, user's fonts dir is under ~/.qttest
+        fonts_dir = Path(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.FontsLocation))
+        fonts_dir.mkdir(parents=True, exist_ok=True)
+        os.utime(fonts_dir, ns=(0, 0))
+        mtimes = _font_dirs_mtimes()
+        self.assertIn([str(fonts_dir), 0], mtimes)
+        (fonts_dir / 'new-font.ttf').touch()
+        try:
+            self.assertNotEqual(_font_dirs_mtimes(), mtimes)
+        finally:
+            (fonts_dir / 'new-font.ttf').unlink()
+
+    def test_relayout(self):
+        from array import array
+        from .tabs.emoji import EmojiTab
+
+        model = EmojiTab.Model()
+        model._rows = array('I', [1, 2, 3])
+        view = QListView()
+        view.setModel(model)
+        view.setCurrentIndex(model.index(2, 0))
+        # Moves persistent indexes to positions beyond the old row count
+        model._relayout(array('I', [10, 11, 12, 13, 14, 3]))
+        self.assertEqual(view.currentIndex().row(), 5)
+        model._relayout(array('I', [4]))
+        self.assertFalse(view.currentIndex().isValid())
+
+    def test_emoji_attributes(self):
+        from .emoji import enum_emojis
+        from .emoji_variants import BITS, HAIR_STYLES, EmojiVariants
+
+        emojis = enum_emojis()
+        variants = EmojiVariants(emojis)
+        row = next(row for row, strings in enumerate(emojis) if strings[0] == '👩🏿‍🦰')
+        self.assertEqual(variants.bits(row), BITS['woman'] | BITS['dark skin tone'] | BITS['red hair'])
+
+        rows = range(len(emojis))
+        genders = ('person', 'man', 'woman')
+        all_hair = variants.preferred(rows, genders=genders)
+        no_red_hair = variants.preferred(rows, genders=genders,
+                                         hair_styles=tuple(HAIR_STYLES.keys() - {'red hair'}))
+        self.assertEqual([emojis.field(row, 0) for row in all_hair if row not in no_red_hair],
+                         ['👨‍🦰', '👩‍🦰', '🧑‍🦰', '🦰'])
+
+
+class TestGlyphAtlas(TestCase):
+    def test_glyph_atlas(self):
+        import shutil
+        from .glyph_atlas import GlyphAtlas
+
+        class GlyphAtlas(GlyphAtlas):
+            SHEET_SIZE = 128  # Many sheets
+
+        font = QFont()
+        font.setPixelSize(20)
+        texts = [chr(i) for i in range(ord('A'), ord('A') + 200)]
+
+        def render(atlas):
+            image = QImage(40 * 20, 24 * 10, QImage.Format.Format_ARGB32_Premultiplied)
+            image.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(image)
+            for i, text in enumerate(texts):
+                atlas.draw(painter, QPoint(i % 20 * 40, i // 20 * 24), text)
+            painter.end()
+            return image
+
+        color = QApplication.instance().palette().color(QPalette.ColorRole.Text)
+        atlas = GlyphAtlas(font, QSize(40, 24), 1., color)
+        shutil.rmtree(atlas.dir, ignore_errors=True)
+        atlas = GlyphAtlas(font, QSize(40, 24), 1., color)
+        self.assertEqual(len(atlas), 0)
+        image = render(atlas)
+        self.assertEqual(len(atlas), len(texts))
+        self.assertEqual(render(atlas), image)
+        atlas.save()
+
+        atlas = GlyphAtlas(font, QSize(40, 24), 1., color)
+        self.assertEqual(len(atlas), len(texts))
+        self.assertEqual(render(atlas), image)
+        self.assertEqual(len(atlas), len(texts))
+
+        # Not persistent: neither loaded nor saved
+        atlas = GlyphAtlas(font, QSize(40, 24), 1., color, persistent=False)
+        self.assertEqual(len(atlas), 0)
+
+    def test_prune(self):
+        from .glyph_atlas import GlyphAtlas, MAX_CACHED
+
+        font = QFont()
+        color = QApplication.instance().palette().color(QPalette.ColorRole.Text)
+        image = QImage(40, 24, QImage.Format.Format_ARGB32_Premultiplied)
+        dirs = []
+        for size in range(10, 10 + MAX_CACHED + 2):
+            font.setPixelSize(size)
+            atlas = GlyphAtlas(font, QSize(40, 24), 1., color)
+            painter = QPainter(image)
+            atlas.draw(painter, QPoint(), 'A')
+            painter.end()
+            atlas.save()
+            dirs.append(atlas.dir)
+        self.assertEqual(sum(dir.is_dir() for dir in dirs), MAX_CACHED)
+        self.assertTrue(dirs[-1].is_dir())
+
+
+class TestTabs(TestCase):
+    def test_lazy_tabs(self):
+        from . import tabs
+
+        manifests = tabs.tab_manifests()
+        self.assertEqual([m['class'] for m in manifests][:3], ['EmojiTab', 'FiltersTab', 'GifsTab'])
+        for manifest in manifests:
+            self.assertFalse(tabs.tab_icon(manifest).isNull(), manifest)
+            tab_class = tabs.load_tab_class(manifest['class'])
+            self.assertEqual(tab_class.label, manifest['label'])
+            self.assertIs(getattr(tabs, manifest['class']), tab_class)
+
+    def test_manifest_cache(self):
+        import importlib.util
+        import tempfile
+        from .tabs import _read_manifest
+
+        with tempfile.TemporaryDirectory() as dir:
+            file = Path(dir) / 'mytab.py'
+            file.write_text("TAB_MANIFEST = {'class': 'MyTab', 'label': 'My'}\n")
+            spec = importlib.util.spec_from_file_location('efck.tabs.mytab', file)
+            cache = {}
+            self.assertEqual(_read_manifest(spec, cache)['label'], 'My')
+            self.assertIn(str(file), cache)
+            # Cached by mtime
+            cache[str(file)][1]['label'] = 'Cached'
+            self.assertEqual(_read_manifest(spec, cache)['label'], 'Cached')
+            file.write_text("TAB_MANIFEST = {'class': 'MyTab', 'label': 'Mine'}\n")
+            os.utime(file, ns=(0, 0))
+            self.assertEqual(_read_manifest(spec, cache)['label'], 'Mine')
+
+    def test_run_in_thread_cancel(self):
+        import threading
+        from .gui import run_in_thread
+
+        produced, delivered = [], []
+        first_delivered = threading.Event()
+
+        def items():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+                first_delivered.wait(5)
+
+        def on_item(item):
+            delivered.append(item)
+            first_delivered.set()
+            delivery.cancel()
+
+        delivery = run_in_thread(None, items(), on_item)
+        for _ in range(100):
+            if delivered:
+                break
+            QTest.qWait(10)
+        QTest.qWait(50)
+        # The thread stopped iterating, too
+        self.assertEqual(delivered, [0])
+        self.assertLess(len(produced), 5)
+
+
+class TestProfiling(TestCase):
+    def test_report(self):
+        import json
+        import tempfile
+        from . import profiling
+
+        with profiling.phase('test phase'):
+            pass
+        with profiling.phase('test phase'):  # Only first recorded
+            QTest.qWait(10)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'report.json'
+            profiling.write_report(path, version='test')
+            report = json.loads(path.read_text())
+        self.assertEqual(report['version'], 'test')
+        phases = {phase['name']: phase for phase in report['phases']}
+        self.assertIn('import Qt', phases)
+        self.assertLess(phases['test phase']['duration_ms'], 10)
+
+
+class TestUsage(TestCase):
+    def test_usage_store(self):
+        import tempfile
+        import time
+        from .usage import UsageStore
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'usage.jsonl'
+            store, other = UsageStore(path), UsageStore(path)
+            now = time.time()
+            for _ in range(3):
+                store.record('EmojiTab', '🍍', now - 60 * 24 * 3600)  # Decayed
+            store.record('EmojiTab', '🥑', now)
+            store.record('FiltersTab', 'bold', now)
+            self.assertEqual(store.top('EmojiTab'), ['🥑', '🍍'])
+
+            # Other instance's lines are read incrementally
+            other.refresh()
+            self.assertEqual(other.top('FiltersTab'), ['bold'])
+            other.record('EmojiTab', '🍍')
+            store.refresh()
+            self.assertEqual(store.top('EmojiTab'), ['🍍', '🥑'])
+
+            # Compaction keeps lines appended by other instances meanwhile
+            other.record('EmojiTab', '🥝')
+            store._compact()
+            self.assertEqual(len(path.read_text(encoding='utf-8').splitlines()), 1 + 4)
+            self.assertEqual(store.top('EmojiTab'), ['🍍', '🥝', '🥑'])
+            other.refresh()
+            self.assertEqual(other.top('EmojiTab'), ['🍍', '🥝', '🥑'])
+
+            # Compacted file no smaller than what was read, is read anew
+            path.unlink()
+            store, other = UsageStore(path), UsageStore(path)
+            store.record('EmojiTab', '🍍', now)
+            for item in '🥑🥝🍋':
+                other.record('EmojiTab', item, now)
+            other._compact()
+            self.assertGreater(path.stat().st_size, store._offset)
+            store.refresh()
+            self.assertEqual(store.top('EmojiTab'), other.top('EmojiTab'))
+
+
+class TestDaemon(TestCase):
+    def test_reshow_running_instance(self):
+        from .daemon import DaemonServer, notify_running_instance
+
+        class Window(QWidget):
+            n_shown = 0
+
+            def reshow(self):
+                self.n_shown += 1
+
+        window = Window()
+        server = DaemonServer(window)
+        self.assertTrue(server.isListening())
+        self.assertTrue(notify_running_instance())
+        for _ in range(20):
+            QTest.qWait(10)
+            if window.n_shown:
+                break
+        self.assertEqual(window.n_shown, 1)
+        server.close()
+        self.assertFalse(notify_running_instance())
 
 
 class TestOutput(TestCase):
@@ -218,6 +714,157 @@ class TestFilters(TestCase):
             out = mod.func(text)
             self.assertTrue(out, out)
 
+    def test_filter_spec(self):
+        from . import filter_spec
+        from .filter_spec import compile_filter
+
+        mapping = {'a': '𝗮', 'b': 'ɓ', '!': '¡'}
+        default_min_length = filter_spec.VECTORIZE_MIN_LENGTH
+        for min_length in (default_min_length, 0):
+            with self.subTest(vectorize_min_length=min_length):
+                filter_spec.VECTORIZE_MIN_LENGTH = min_length
+                try:
+                    for spec in (dict(mapping=mapping),
+                                 dict(mapping=mapping, reverse=True, suffix='\N{COMBINING LOW LINE}'),
+                                 dict(suffix='\N{COMBINING LOW LINE}'),
+                                 dict(mapping={'a': 'aa'}, suffix='!')):
+                        func = compile_filter(**spec)
+                        for text in ('', 'abc!', 'ab 🍑 č' * 300):
+                            chars = reversed(text) if spec.get('reverse') else text
+                            expected = ''.join(spec.get('mapping', {}).get(ch, ch) + spec.get('suffix', '')
+                                               for ch in chars)
+                            self.assertEqual(func(text), expected, spec)
+                finally:
+                    filter_spec.VECTORIZE_MIN_LENGTH = default_min_length
+
+    def test_previews(self):
+        from .tabs.filters import FiltersTab, module_basename
+
+        model = FiltersTab.Model()
+        model.init(config={})
+        rows = {module_basename(mod): row for row, mod in enumerate(model.modules)}
+        zalgo = model.index(rows['zalgo'], 0)
+        for text in ('peach', 'peach ' * FiltersTab.Model.THREAD_MIN_LENGTH):
+            with self.subTest(length=len(text)):
+                model.set_text(text)
+                for _ in range(200):
+                    if model.data(zalgo, model.OutputRole) != model.PENDING:
+                        break
+                    QTest.qWait(10)
+                preview = model.data(zalgo, model.OutputRole)
+                self.assertNotEqual(preview, model.PENDING)
+                # Random filter is evaluated once per query
+                model.set_text(text)
+                self.assertEqual(model.data(zalgo, model.OutputRole), preview)
+                self.assertEqual(model.output(rows['zalgo']), preview)
+                self.assertEqual(model.output(rows['bold']), model.modules[rows['bold']].func(text))
+
+    def test_filter_chains(self):
+        from .filter_modules import chain_func, load_chains, load_modules, module_basename
+        from .filter_spec import compile_chain
+        from .tabs.filters import FiltersTab
+
+        modules = {module_basename(mod): mod for mod in load_modules()}
+        text = 'Hello, World! 0123 čšž 🍑 ' * 50
+        for names in (['bold', 'underline'], ['monospace', 'strikethrough'], ['leetspeak', 'squared'],
+                      ['upside_down', 'bold', 'upside_down'], ['underline', 'upside_down'], ['lmgtfy', 'bold']):
+            with self.subTest(names=names):
+                expected = text
+                for name in names:
+                    expected = modules[name].func(expected)
+                self.assertEqual(chain_func([modules[name] for name in names])(text), expected)
+        # Reversing after a suffix doesn't fuse
+        self.assertIsNotNone(compile_chain([modules['upside_down'].func.spec, modules['underline'].func.spec]))
+        self.assertIsNone(compile_chain([modules['underline'].func.spec, modules['upside_down'].func.spec]))
+
+        chains = load_chains(['bold+underline', 'bold+nonexistent'], modules.values())
+        self.assertEqual([module_basename(chain) for chain in chains], ['bold+underline'])
+        model = FiltersTab.Model()
+        model.init(config={'chains': ['bold+underline']})
+        self.assertEqual(model.rowCount(None), len(modules) + 1)
+        model.set_text('abc')
+        self.assertEqual(model.output(len(modules)), modules['underline'].func(modules['bold'].func('abc')))
+
+    def test_filter_sandbox(self):
+        import tempfile
+        from .filter_modules import load_modules, module_basename
+        from .filter_sandbox import FilterError, SLOW
+        from .tabs.filters import FiltersTab
+
+        def wait_for_output(index):
+            for _ in range(1000):
+                if index.data(model.OutputRole) != model.PENDING:
+                    break
+                QTest.qWait(10)
+            return index.data(model.OutputRole)
+
+        with tempfile.TemporaryDirectory() as config_dir:
+            (Path(config_dir) / 'filters').mkdir()
+            (Path(config_dir) / 'filters' / 'shouting.py').write_text(
+                'import time\n'
+                'def func(text):\n'
+                '    if "slow" in text:\n'
+                '        time.sleep(60)\n'
+                '    return text.upper()\n')
+            model = FiltersTab.Model()
+            model._filters = load_modules([config_dir])
+            model.init(config={'chains': ['shouting+bold']})
+            self.addCleanup(model._sandbox.close)
+            model._sandbox.timeout = .5
+            rows = {module_basename(mod): row for row, mod in enumerate(model.modules)}
+            shouting, chain = model.index(rows['shouting'], 0), model.index(rows['shouting+bold'], 0)
+            bold = model.modules[rows['bold']].func
+
+            model.set_text('abc')
+            # Built-in filters run in-process, user's in the sandbox
+            self.assertEqual(model.index(rows['bold'], 0).data(model.OutputRole), bold('abc'))
+            self.assertEqual(wait_for_output(shouting), 'ABC')
+            self.assertEqual(wait_for_output(chain), bold('ABC'))
+            self.assertIsNone(shouting.data(model.StatusRole))
+
+            # Typing out a pending row waits for it, not for the whole running map
+            model.set_text('def')
+            self.assertEqual(model.output(rows['shouting']), 'DEF')
+            self.assertEqual(wait_for_output(chain), bold('DEF'))
+
+            model.set_text('slow')
+            self.assertEqual(wait_for_output(shouting), '')
+            self.assertEqual(shouting.data(model.StatusRole), SLOW)
+
+            # A map that doesn't get to the call is waited for only until the deadline
+            origins = model._sandboxed[rows['shouting']]
+            stalled = model._sandbox.map([(None, origins, 'ghi')])
+            self.assertEqual(model._sandbox.call(origins, 'ghi'), 'GHI')
+            self.assertEqual(list(stalled), [])  # Canceled
+
+            model._sandbox.close()
+            with self.assertRaises(FilterError):
+                model._sandbox.call(model._sandboxed[rows['shouting']], 'abc')
+
+    def test_filter_cli(self):
+        import io
+        import subprocess
+        import sys
+        from .filter_cli import filter_chain, transform_files
+
+        text = 'Hello world\r\n' + 'ab 🍑\n' * 2500 + 'end'
+        transform = filter_chain(['upside_down', 'bold'])
+        expected = ''.join(transform(line.rstrip('\r\n')) + line[len(line.rstrip('\r\n')):]
+                           for line in text.splitlines(keepends=True))
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                out = io.StringIO()
+                transform_files([io.StringIO(text, newline='')], out, ['upside_down', 'bold'], jobs=jobs)
+                self.assertEqual(out.getvalue(), expected)
+
+        # Runs without Qt (invalid QT_API would fail its import)
+        env = dict(os.environ, QT_API='none')
+        # Filter chains are named like in the Filters tab
+        output = subprocess.run([sys.executable, '-m', __package__, 'filter', 'upside_down+bold'],
+                                input='abc'.encode(), capture_output=True, check=True, env=env,
+                                cwd=Path(__file__).parent.parent).stdout.decode()
+        self.assertEqual(output, transform('abc'))
+
 
 if __name__ == '__main__':
     unittest.main()
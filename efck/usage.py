@@ -0,0 +1,191 @@
+"""
+Usage history of activated items, for offering the usual choices first.
+
+Each activation appends a JSON line `[timestamp, tab, item]` to
+`USAGE_FILENAME` in the config dir. An item's score is the sum of its
+activations, each decaying with `HALF_LIFE_DAYS`. The file is read
+incrementally, i.e. only lines appended since the last read (e.g. by
+another instance) are parsed. When it grows past `MAX_LINES`, it is
+compacted into lines `[timestamp, tab, item, score]` of the `MAX_ITEMS`
+top items per tab, after a header line `{"generation": id}`. A file
+replaced with another inode or generation is read anew.
+Appending and compacting take a lock file, so that compaction by one
+instance doesn't lose lines appended by another.
+"""
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+
+from .profiling import phase
+
+logger = logging.getLogger(__name__)
+
+USAGE_FILENAME = 'usage.jsonl'
+HALF_LIFE_DAYS = 14
+MAX_ITEMS = 100
+MAX_LINES = 1000
+#: Milliseconds to wait for another instance's lock
+LOCK_TIMEOUT = 1000
+
+_DAY = 24 * 3600
+
+
+def _decayed(score, seconds):
+    return score * .5 ** (seconds / (HALF_LIFE_DAYS * _DAY))
+
+
+class UsageStore:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._items = {}  # Tab -> {item: (score, timestamp of score)}
+        self._offset = 0  # File size read so far
+        self._n_lines = 0
+        self._file_id = None  # (device, inode, generation) of the file read so far
+        #: Incremented on each change, for users to invalidate what they derived
+        self.version = 0
+
+    def _clear(self):
+        self._items.clear()
+        self._offset = self._n_lines = 0
+        self._file_id = None
+        self.version += 1
+
+    def _lock(self):
+        from .qt import QLockFile
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock = QLockFile(str(self.path.with_name(f'{self.path.name}.lock')))
+        if not lock.tryLock(LOCK_TIMEOUT):
+            logger.warning('Usage history locked by another instance')
+        return lock
+
+    def refresh(self):
+        """Read lines appended to the file since the last refresh."""
+        try:
+            stat = self.path.stat()
+        except OSError:
+            if self._offset:
+                self._clear()
+            return
+        size = stat.st_size
+        if size < self._offset or (self._file_id and self._file_id[:2] != (stat.st_dev, stat.st_ino)):
+            # Compacted by another instance
+            self._clear()
+        if size == self._offset:
+            return
+        try:
+            with open(self.path, 'rb') as fd:
+                generation = self._read_generation(fd)
+                if self._file_id and self._file_id[2] != generation:
+                    self._clear()  # Compacted, reusing the inode
+                self._file_id = (stat.st_dev, stat.st_ino, generation)
+                fd.seek(self._offset)
+                data = fd.read(size - self._offset)
+        except OSError as e:
+            logger.warning('Error reading usage history: %s', e)
+            return
+        # A line may be still being written by another instance
+        data = data[:data.rfind(b'\n') + 1]
+        for line in data.splitlines():
+            if line.startswith(b'{'):
+                continue  # Header
+            try:
+                timestamp, tab, item, *score = json.loads(line)
+                self._add(tab, item, timestamp, *score)
+            except (ValueError, TypeError) as e:
+                logger.warning('Skipping invalid usage history line %r: %s', line, e)
+        self._offset += len(data)
+        self._n_lines += data.count(b'\n')
+        self.version += 1
+
+    @staticmethod
+    def _read_generation(fd):
+        line = fd.readline()
+        if line.startswith(b'{') and line.endswith(b'\n'):
+            try:
+                return json.loads(line).get('generation')
+            except (ValueError, AttributeError):
+                pass
+        return None
+
+    def _add(self, tab, item, timestamp, score=1):
+        items = self._items.setdefault(tab, {})
+        old_score, old_timestamp = items.get(item, (0, timestamp))
+        last = max(timestamp, old_timestamp)
+        items[item] = (_decayed(old_score, last - old_timestamp) + _decayed(score, last - timestamp), last)
+
+    def record(self, tab, item, timestamp=None):
+        """Record activation of `item` (a string) on `tab` (a class name)."""
+        self.refresh()
+        line = json.dumps([round(time.time() if timestamp is None else timestamp), tab, item],
+                          ensure_ascii=False)
+        try:
+            lock = self._lock()
+            try:
+                with open(self.path, 'a', encoding='utf-8') as fd:
+                    fd.write(line + '\n')
+            finally:
+                lock.unlock()
+        except OSError as e:
+            logger.warning('Error writing usage history: %s', e)
+            return
+        self.refresh()
+        if self._n_lines > MAX_LINES:
+            self._compact()
+
+    def top(self, tab, n=MAX_ITEMS) -> list:
+        """Return `n` items of `tab` with the highest score, highest first."""
+        now = time.time()
+        items = self._items.get(tab, {})
+        scores = {item: _decayed(score, now - timestamp)
+                  for item, (score, timestamp) in items.items()}
+        return sorted(scores, key=scores.get, reverse=True)[:n]
+
+    def _compact(self):
+        try:
+            lock = self._lock()
+        except OSError as e:
+            logger.warning('Error compacting usage history: %s', e)
+            return
+        if not lock.isLocked():
+            return  # Maybe compacting in another instance
+        try:
+            # Lines appended by other instances until now are kept
+            self.refresh()
+            lines = [json.dumps({'generation': uuid.uuid4().hex}) + '\n']
+            for tab in self._items:
+                items = self._items[tab]
+                for item in reversed(self.top(tab)):
+                    score, timestamp = items[item]
+                    lines.append(json.dumps([timestamp, tab, item, round(score, 4)], ensure_ascii=False) + '\n')
+            tmp_file = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as fd:
+                    fd.writelines(lines)
+                os.replace(tmp_file, self.path)
+            except OSError as e:
+                logger.warning('Error compacting usage history: %s', e)
+                return
+        finally:
+            lock.unlock()
+        logger.info('Compacted usage history from %d to %d lines', self._n_lines, len(lines))
+        self._clear()
+        self.refresh()
+
+
+_store = None
+
+
+def usage_store() -> UsageStore:
+    """Return the usage store in the config dir."""
+    global _store
+    if _store is None:
+        from . import CONFIG_DIRS
+
+        _store = UsageStore(Path(CONFIG_DIRS[0]) / USAGE_FILENAME)
+        with phase('load usage history'):
+            _store.refresh()
+    return _store
@@ -1,26 +1,93 @@
+import ast
 import importlib.util
+import locale
 import logging
+import os
 import pkgutil
+import sys
 from pathlib import Path
 
-from . import CONFIG_DIRS
+from . import APP_NAME
 
 logger = logging.getLogger(__name__)
 
 
 def iter_modules_from_dir(dir: str, prefix: str):
+    for spec in iter_module_specs_from_dir(dir, prefix):
+        yield exec_module_from_spec(spec)
+
+
+def iter_module_specs_from_dir(dir: str, prefix: str):
     for modinfo in pkgutil.iter_modules([dir], prefix=prefix):
-        spec = modinfo.module_finder.find_spec(modinfo.name)
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-        yield module
+        yield modinfo.module_finder.find_spec(modinfo.name)
+
+
+def exec_module_from_spec(spec):
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def read_module_literal(spec, name: str):
+    """
+    Return the literal value of top-level assignment `name = ...` in
+    the source of module `spec`, without executing the module, or None.
+    """
+    try:
+        with open(spec.origin, 'rb') as fd:
+            tree = ast.parse(fd.read(), spec.origin)
+    except (OSError, TypeError, SyntaxError, ValueError):
+        return None
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and
+                any(isinstance(target, ast.Name) and target.id == name for target in node.targets)):
+            try:
+                return ast.literal_eval(node.value)
+            except ValueError:
+                logger.warning('%s in "%s" is not a literal', name, spec.origin)
+    return None
+
 
+def app_config_dirs() -> list:
+    """
+    Return the same dirs as `CONFIG_DIRS` (QStandardPaths.AppConfigLocation),
+    user's first, but without importing Qt.
+    """
+    if sys.platform == 'win32':
+        dirs = [os.environ.get('LOCALAPPDATA', '~/AppData/Local'), os.environ.get('PROGRAMDATA', 'C:/ProgramData')]
+    elif sys.platform == 'darwin':
+        dirs = ['~/Library/Preferences', '/Library/Preferences']
+    else:
+        dirs = [os.environ.get('XDG_CONFIG_HOME') or '~/.config',
+                *(os.environ.get('XDG_CONFIG_DIRS') or '/etc/xdg').split(os.pathsep)]
+    return [str(Path(dir, APP_NAME).expanduser()) for dir in dirs if dir]
 
-def iter_config_dirs(subdir):
+
+def iter_config_dirs(subdir, config_dirs=None):
+    """
+    Yield the built-in `subdir`, followed by existing `subdir`s of
+    `config_dirs` (default: `CONFIG_DIRS`), the user's last.
+    """
     assert subdir
+    if config_dirs is None:
+        from . import CONFIG_DIRS as config_dirs
     yield Path(__file__).parent / subdir
-    logger.debug('Config dirs: %s', CONFIG_DIRS)
-    for dir in reversed(CONFIG_DIRS):
+    logger.debug('Config dirs: %s', config_dirs)
+    for dir in reversed(config_dirs):
         path = Path(dir) / subdir
         if path.is_dir():
             yield path
+
+
+def system_locales() -> set:
+    """Return names of the user's locales, e.g. `{'sl_SI'}`."""
+    from .qt import QLocale
+
+    return {QLocale.system().name(), locale.getlocale()[0]} - {None}  # None on "C" locale
+
+
+def cache_dir() -> Path:
+    """Return user's (writable) cache dir for our derived, disposable data."""
+    from .qt import QStandardPaths
+
+    return Path(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation))
@@ -1,3 +1,9 @@
 #!/usr/bin/env python3
+import multiprocessing
+
 import efck.__main__
-efck.__main__.main()
+
+if __name__ == '__main__':
+    # Frozen (PyInstaller) processes spawned by `multiprocessing` run filters, not the app
+    multiprocessing.freeze_support()
+    efck.__main__.main()
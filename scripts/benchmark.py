@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks of the performance-critical code paths.
+
+Run from project root with:
+$ scripts/benchmark.py [benchmark ...]
+"""
+import argparse
+import os
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+# Realistic queries as typed, including incomplete words
+EMOJI_QUERIES = [
+    'a', 'sm', 'avo', 'avocado', 'heart', 'red heart', 'smil fac',
+    'thumbs up', 'flag', 'cat', 'party', 'zzz', ':)',
+]
+
+
+def _time_ms(func, repeat=3):
+    """Return best-of-`repeat` mean run time of `func` in milliseconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1000
+
+
+def _emoji_data():
+    from efck.emoji import enum_emojis
+
+    return enum_emojis()
+
+
+def bench_emoji_search():
+    """Inverted n-gram index vs. plain scan of all emoji."""
+    from efck.emoji_index import EmojiIndex, first_matching_string
+
+    emoji_data = _emoji_data()
+    print(f'Index build: {_time_ms(lambda: EmojiIndex(emoji_data), 3):.2f} ms')
+    index = EmojiIndex(emoji_data)
+
+    def scan(words):
+        return [row for row, strings in enumerate(emoji_data)
+                if first_matching_string(strings, words)]
+
+    print(f'{"query":12s} {"rows":>6s} {"scan ms":>9s} {"index ms":>9s}')
+    for query in EMOJI_QUERIES:
+        words = query.split()
+        assert scan(words) == index.search(words), query
+        print(f'{query:12s} {len(scan(words)):6d} '
+              f'{_time_ms(lambda: scan(words)):9.3f} '
+              f'{_time_ms(lambda: index.search(words)):9.3f}')
+
+
+def bench_emoji_rank():
+    """Relevance ranking of search results, against the per-keystroke budget."""
+    from efck.emoji_index import EmojiIndex
+    from efck.gui import LineEdit
+
+    emoji_data = _emoji_data()
+    index = EmojiIndex(emoji_data)
+    print(f'Budget per keystroke: {LineEdit.TIMEOUT_INTERVAL} ms')
+    print(f'{"query":12s} {"rows":>6s} {"search ms":>10s} {"rank ms":>8s}  top')
+    for query in EMOJI_QUERIES:
+        words = query.split()
+        rows = index.search(words)
+        top = ''.join(emoji_data.field(row, 0) for row in index.rank(rows, words)[:8])
+        print(f'{query:12s} {len(rows):6d} '
+              f'{_time_ms(lambda: index.search(words)):10.3f} '
+              f'{_time_ms(lambda: index.rank(rows, words)):8.3f}  {top}')
+
+
+def bench_emoji_fuzzy():
+    """Typo-tolerant search, against the per-keystroke budget."""
+    from efck.emoji_fuzzy import FuzzyIndex
+    from efck.emoji_index import EmojiIndex
+    from efck.gui import LineEdit
+
+    emoji_data = _emoji_data()
+    index = EmojiIndex(emoji_data)
+    fuzzy = None
+
+    def build():
+        nonlocal fuzzy
+        fuzzy = FuzzyIndex(index)
+
+    print(f'Build: {_time_ms(build):.1f} ms')
+    print(f'Budget per keystroke: {LineEdit.TIMEOUT_INTERVAL} ms')
+    print(f'{"query":12s} {"rows":>6s} {"search ms":>10s}  top')
+    for query in ('avacado', 'thumbs upp', 'hert', 'smilng fac', 'unicron', 'piza', 'gren hart'):
+        words = query.split()
+        rows = fuzzy.search(words)
+        top = ''.join(emoji_data.field(row, 0) for row in rows[:8])
+        print(f'{query:12s} {len(rows):6d} {_time_ms(lambda: fuzzy.search(words)):10.3f}  {top}')
+
+
+def bench_emoji_semantic():
+    """Semantic search (requires NumPy), against the per-keystroke budget."""
+    import tempfile
+    from pathlib import Path
+    from efck.emoji_semantic import SemanticIndex, is_available
+    from efck.gui import LineEdit
+
+    if not is_available():
+        print('NumPy not installed')
+        return
+    emoji_data = _emoji_data()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_file = Path(tmpdir) / 'semantic.npz'
+        build_ms = _time_ms(lambda: (cache_file.unlink(missing_ok=True),
+                                     SemanticIndex(emoji_data, cache_file=cache_file)), repeat=1)
+        print(f'Build: {build_ms:.1f} ms ({cache_file.stat().st_size // 1024} KiB), '
+              f'load: {_time_ms(lambda: SemanticIndex(emoji_data, cache_file=cache_file)):.1f} ms')
+        index = SemanticIndex(emoji_data, cache_file=cache_file)
+    print(f'Budget per keystroke: {LineEdit.TIMEOUT_INTERVAL} ms')
+    print(f'{"query":12s} {"rows":>6s} {"search ms":>10s}  top')
+    for query in ('party', 'sad', 'celebrate', 'love', 'tired', 'smil fac'):
+        words = query.split()
+        rows = index.search(words)
+        top = ''.join(emoji_data.field(row, 0) for row in rows[:8])
+        print(f'{query:12s} {len(rows):6d} {_time_ms(lambda: index.search(words)):10.3f}  {top}')
+
+
+def bench_emoji_paint():
+    """Paint time of a full frame of the emoji grid view per query."""
+    from efck.qt import QStandardPaths, QTest
+    from efck import CONFIG_DIRS
+
+    QStandardPaths.setTestModeEnabled(True)
+    CONFIG_DIRS[:] = QStandardPaths.standardLocations(QStandardPaths.StandardLocation.AppConfigLocation)
+
+    from efck.config import config_state, load_config
+    from efck.gui import MainWindow
+
+    load_config()
+    config_state['selected_tab'] = 0
+    window = MainWindow()
+    window.resize(600, 800)
+    window.show()
+    tab = window.current_tab
+    QTest.qWait(500)
+
+    print(f'{"query":12s} {"first ms":>9s} {"repaint ms":>11s}')
+    for query in ['', *EMOJI_QUERIES]:
+        tab.line_edit.setText(query)
+        tab.line_edit.textEdited.emit(query)
+        QTest.qWait(200)
+        viewport = tab.view.viewport()
+        # First frame of a new query, then repaints of the same frame
+        start = time.perf_counter()
+        viewport.grab()
+        first = (time.perf_counter() - start) * 1000
+        print(f'{query:12s} {first:9.3f} {_time_ms(viewport.grab):11.3f}')
+
+
+def bench_filters():
+    """Throughput of filters on multi-kilobyte input, compiled specs vs. per-character generators."""
+    from efck.filter_spec import has_spec
+    from efck.filter_modules import load_modules, module_basename
+
+    def generator_func(module):
+        # How mapping filters used to be implemented
+        mapping, suffix = getattr(module, 'mapping', {}), getattr(module, 'suffix', '')
+        reverse = getattr(module, 'reverse', False)
+        return lambda text: ''.join(mapping.get(ch, ch) + suffix for ch in (reversed(text) if reverse else text))
+
+    sample = 'The quick brown fox jumps over the lazy dog 0123456789! '
+    print(f'{"filter":14s} {"KiB":>4s} {"generator MB/s":>15s} {"compiled MB/s":>14s}')
+    for module in load_modules():
+        func = module.func
+        for size in (4, 64):
+            text = (sample * (size * 1024 // len(sample) + 1))[:size * 1024]
+            compiled = f'{size / 1024 / _time_ms(lambda: func(text)) * 1000:14.1f}'
+            if has_spec(module):
+                generator = f'{size / 1024 / _time_ms(lambda: generator_func(module)(text)) * 1000:15.1f}'
+            else:
+                generator, compiled = f'{compiled:>15s}', f'{"-":>14s}'
+            print(f'{module_basename(module):14s} {size:4d} {generator} {compiled}')
+
+
+def bench_filter_chains():
+    """Throughput of the default filter chains, fused into a single pass vs. applied filter by filter."""
+    from efck.config import _filters_tab
+    from efck.filter_modules import load_chains, load_modules, module_basename
+
+    sample = 'The quick brown fox jumps over the lazy dog 0123456789! '
+    print(f'{"chain":24s} {"KiB":>4s} {"sequential MB/s":>16s} {"fused MB/s":>11s}')
+    for chain in load_chains(_filters_tab['chains'] + ['upside_down+squared', 'leetspeak+underline'], load_modules()):
+        funcs = [module.func for module in chain.modules]
+
+        def sequential(text):
+            for func in funcs:
+                text = func(text)
+            return text
+
+        for size in (4, 64):
+            text = (sample * (size * 1024 // len(sample) + 1))[:size * 1024]
+            sequential_mbs = size / 1024 / _time_ms(lambda: sequential(text)) * 1000
+            fused_mbs = size / 1024 / _time_ms(lambda: chain.func(text)) * 1000
+            print(f'{module_basename(chain):24s} {size:4d} {sequential_mbs:16.1f} {fused_mbs:11.1f}')
+
+
+BENCHMARKS = {
+    'emoji-search': bench_emoji_search,
+    'emoji-rank': bench_emoji_rank,
+    'emoji-fuzzy': bench_emoji_fuzzy,
+    'emoji-semantic': bench_emoji_semantic,
+    'emoji-paint': bench_emoji_paint,
+    'filters': bench_filters,
+    'filter-chains': bench_filter_chains,
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmarks', nargs='*', choices=[[], *BENCHMARKS],
+                        help='Benchmarks to run (default: all)')
+    args = parser.parse_args()
+
+    for name in args.benchmarks or BENCHMARKS:
+        print(f'\n## {name}: {BENCHMARKS[name].__doc__}')
+        BENCHMARKS[name]()
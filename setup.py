@@ -44,6 +44,7 @@ if __name__ == '__main__':
             ],
             'extra': [
                 'unicodedata2',
+                'numpy',  # for semantic emoji search
             ]
         },
         entry_points={